@@ -0,0 +1,9 @@
+"""Offline throughput benchmarks for the upload, preview, import, export and paging paths.
+
+    cd backend && python -m benchmarks.run --rows 1m,10m
+
+Synthetic ``uk_price_paid``-shaped files are generated once into
+``benchmarks/data`` and reused; ClickHouse is replaced by an in-process
+stand-in, so no server is needed. Reports are written as JSON to
+``benchmarks/reports``.
+"""
@@ -0,0 +1,149 @@
+"""In-process stand-in for a clickhouse_connect client, so benchmarks need no server.
+
+Inserts are accepted and counted without being serialised. Reads return a
+synthetic ``uk_price_paid`` table of a given size: one prebuilt block is
+repeated, so producing rows costs next to nothing and the timings reflect
+this codebase rather than the stand-in. Every read returns all columns of
+the table, whatever the SELECT list.
+"""
+import io
+from datetime import date
+from typing import Iterator, List
+
+import pandas as pd
+
+from benchmarks.synthetic import COLUMNS, generate_frame, to_csv_bytes
+
+BLOCK_ROWS = 65536  # clickhouse_connect's default block size for streamed results
+TABLE_NAME = 'uk.uk_price_paid'
+COLUMN_TYPES = {
+    'price': 'UInt32', 'date': 'Date', 'is_new': 'UInt8', 'category': 'UInt8',
+}
+
+
+class StandInResult:
+    def __init__(self, rows: List[tuple]):
+        self.result_rows = rows
+
+
+class StandInType:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class StandInQuery:
+    """The ``source`` of a stream, carrying the result's column types like a QueryResult."""
+
+    def __init__(self, column_types: List[str]):
+        self.column_types = [StandInType(name) for name in column_types]
+
+
+class StandInBlockStream:
+    def __init__(self, blocks: Iterator[List], column_types: List[str]):
+        self._blocks = blocks
+        self.source = StandInQuery(column_types)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return self._blocks
+
+
+class StandInRawStream(io.RawIOBase):
+    """File-like CSVWithNames result: the header, then one rendered block repeated."""
+
+    def __init__(self, header: bytes, block: bytes, block_rows: int, rows: int):
+        self._buffer = header
+        self._position = 0
+        self._block = block
+        self._block_rows = block_rows
+        self._remaining = rows
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        # Short reads at block boundaries, like a socket; b'' only at the end
+        if self._position >= len(self._buffer):
+            if self._remaining <= 0:
+                return b''
+            if self._remaining >= self._block_rows:
+                self._buffer = self._block
+            else:
+                self._buffer = b''.join(line + b'\n' for line in self._block.split(b'\n')[:self._remaining])
+            self._remaining -= min(self._remaining, self._block_rows)
+            self._position = 0
+        end = len(self._buffer) if size is None or size < 0 else self._position + size
+        data = self._buffer[self._position:end]
+        self._position += len(data)
+        return data
+
+
+class StandInClient:
+    """Accepts inserts and serves ``rows`` synthetic rows for any query."""
+
+    def __init__(self, rows: int = 0, seed: int = 0, block_rows: int = BLOCK_ROWS):
+        self.rows = rows
+        self.inserted_rows = 0
+        self.inserted_batches = 0
+        frame = generate_frame(min(block_rows, max(rows, 1)), seed)
+        self._csv_block = to_csv_bytes(frame)
+        # Typed like clickhouse_connect's results: dates as date objects, numbers as ints
+        frame['date'] = [date.fromisoformat(value) for value in frame['date']]
+        frame = frame.astype({'price': int, 'is_new': int, 'category': int})
+        self._block = [frame[column].tolist() for column in COLUMNS]
+        self._block_rows = len(frame)
+
+    def _blocks(self) -> Iterator[List[list]]:
+        remaining = self.rows
+        while remaining > 0:
+            rows = min(remaining, self._block_rows)
+            remaining -= rows
+            yield self._block if rows == self._block_rows else [values[:rows] for values in self._block]
+
+    def _column_types(self) -> List[str]:
+        return [COLUMN_TYPES.get(column, 'String') for column in COLUMNS]
+
+    def query_column_block_stream(self, query: str, parameters=None, **kwargs) -> StandInBlockStream:
+        return StandInBlockStream(self._blocks(), self._column_types())
+
+    def query_row_block_stream(self, query: str, parameters=None, **kwargs) -> StandInBlockStream:
+        return StandInBlockStream((list(zip(*block)) for block in self._blocks()), self._column_types())
+
+    def raw_stream(self, query: str, parameters=None, fmt=None, **kwargs) -> StandInRawStream:
+        header = (','.join(f'"{column}"' for column in COLUMNS) + '\n').encode()
+        return StandInRawStream(header, self._csv_block, self._block_rows, self.rows)
+
+    def query(self, query: str, parameters=None, **kwargs) -> StandInResult:
+        if 'system.tables' in query:
+            return StandInResult([(TABLE_NAME, 'MergeTree', self.rows)])
+        if 'system.columns' in query:
+            database, _, table = TABLE_NAME.partition('.')
+            return StandInResult([
+                (database, table, column, column_type, '', '')
+                for column, column_type in zip(COLUMNS, self._column_types())
+            ])
+        if 'count()' in query:
+            return StandInResult([(self.rows,)])
+        return StandInResult([])
+
+    def command(self, query: str, parameters=None, **kwargs):
+        return 1
+
+    def insert_df(self, table: str, df: pd.DataFrame, column_names=None, settings=None, **kwargs):
+        self.inserted_rows += len(df)
+        self.inserted_batches += 1
+
+    def insert_arrow(self, table: str, arrow_table, settings=None, **kwargs):
+        self.inserted_rows += arrow_table.num_rows
+        self.inserted_batches += 1
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self):
+        pass
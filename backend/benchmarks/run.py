@@ -0,0 +1,284 @@
+"""Benchmark the hot paths against synthetic data and write a JSON report.
+
+    cd backend && python -m benchmarks.run --rows 1m,10m,100m
+    cd backend && python -m benchmarks.run --rows 1m --baseline benchmarks/reports/previous.json
+
+Each stage runs in a fresh process, so its peak RSS is its own and no
+cache carries over from an earlier stage. With ``--baseline`` stages whose
+rows/sec dropped by more than ``--tolerance`` are listed as regressions
+and the exit status is 1.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import COLUMNS, ensure_dataset, parse_rows, rows_label
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGES = ('upload', 'preview', 'columns', 'import', 'export_raw', 'export', 'paging')
+PAGE_SIZE = 1000
+RANDOM_PAGES = 20
+UNLIMITED_UPLOAD = 1 << 62
+
+
+class Stopwatch:
+    """Accumulates the time spent inside ``with stopwatch:`` blocks, leaving setup untimed."""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed += time.perf_counter() - self._start
+        return False
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives exec on Linux, so a spawned process would report its
+    # parent's peak; VmHWM is this process's own high-water mark
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _upload(source: str, rows: int, seed: int, timer: Stopwatch) -> Dict[str, Any]:
+    from services.flatfile_service import FlatFileService
+
+    with open(source, 'rb') as f, timer:
+        info = FlatFileService()._save_file(os.path.basename(source), f)
+    return {'rows': info.row_count, 'bytes': info.size_bytes}
+
+
+def _preview(source: str, rows: int, seed: int, timer: Stopwatch) -> Dict[str, Any]:
+    from services.flatfile_service import FlatFileService
+
+    with timer:
+        preview = FlatFileService()._preview_file(os.path.basename(source), 100, estimate=True)
+    return {'rows': len(preview.data), 'total_rows': preview.total_rows}
+
+
+def _columns(source: str, rows: int, seed: int, timer: Stopwatch) -> Dict[str, Any]:
+    from services.flatfile_service import FlatFileService
+
+    with timer:
+        columns = FlatFileService()._get_file_columns(os.path.basename(source))
+    return {'rows': max((column.sample_rows for column in columns), default=0), 'columns': len(columns)}
+
+
+def _import(source: str, rows: int, seed: int, timer: Stopwatch) -> Dict[str, Any]:
+    from benchmarks.fake_clickhouse import TABLE_NAME, StandInClient
+    from services.clickhouse_service import ClickHouseService
+
+    service = ClickHouseService(StandInClient())
+    with timer:
+        result = service._import_from_flatfile(TABLE_NAME, source, COLUMNS, resume=False)
+    return {'rows': result.record_count, 'batches': result.batch_count, 'bytes': os.path.getsize(source)}
+
+
+def _export(source: str, rows: int, seed: int, timer: Stopwatch, fmt: Optional[str] = None) -> Dict[str, Any]:
+    from benchmarks.fake_clickhouse import TABLE_NAME, StandInClient
+    from services.clickhouse_service import ClickHouseService
+
+    service = ClickHouseService(StandInClient(rows, seed))
+    with timer:
+        result = service._export_data(TABLE_NAME, COLUMNS, stream=True, fmt=fmt)
+    return {'rows': result.record_count, 'bytes': os.path.getsize(result.file_path)}
+
+
+def _export_raw(source: str, rows: int, seed: int, timer: Stopwatch) -> Dict[str, Any]:
+    return _export(source, rows, seed, timer, fmt='CSVWithNames')
+
+
+def _paging(source: str, rows: int, seed: int, timer: Stopwatch) -> Dict[str, Any]:
+    from benchmarks.fake_clickhouse import TABLE_NAME
+    from services.clickhouse_service import ClickHouseService
+    from services.row_index import read_page
+
+    # Page through the export when the export stage ran, otherwise through the upload
+    exported = ClickHouseService()._export_file_path(TABLE_NAME)
+    file_path = exported if os.path.exists(exported) else source
+    # The first page also builds the row index
+    with timer:
+        _, total = read_page(file_path, 0, PAGE_SIZE)
+    first_page = timer.elapsed
+
+    rng = random.Random(seed)
+    offsets = [rng.randrange(max(total - PAGE_SIZE, 1)) for _ in range(RANDOM_PAGES)]
+    with timer:
+        for offset in offsets:
+            read_page(file_path, offset, PAGE_SIZE, total)
+    return {
+        'rows': (RANDOM_PAGES + 1) * PAGE_SIZE,
+        'pages': RANDOM_PAGES + 1,
+        'first_page_seconds': round(first_page, 4),
+        'page_seconds': round((timer.elapsed - first_page) / RANDOM_PAGES, 4),
+    }
+
+
+STAGE_FUNCTIONS: Dict[str, Callable[[str, int, int, Stopwatch], Dict[str, Any]]] = {
+    'upload': _upload,
+    'preview': _preview,
+    'columns': _columns,
+    'import': _import,
+    'export_raw': _export_raw,
+    'export': _export,
+    'paging': _paging,
+}
+
+
+def run_stage(stage: str, upload_dir: str, source: str, rows: int, seed: int) -> Dict[str, Any]:
+    """Runs in a fresh process: time one stage and report its throughput and peak RSS."""
+    from config.settings import settings
+
+    settings.UPLOAD_DIR = upload_dir
+    settings.MAX_FILE_SIZE = UNLIMITED_UPLOAD
+    baseline_rss = peak_rss_mb()
+    timer = Stopwatch()
+    stats = STAGE_FUNCTIONS[stage](source, rows, seed, timer)
+    wall = timer.elapsed
+    return {
+        'stage': stage,
+        'dataset_rows': rows,
+        'wall_seconds': round(wall, 3),
+        'rows_per_second': round(stats['rows'] / wall, 1) if wall > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'baseline_rss_mb': baseline_rss,
+        **stats,
+    }
+
+
+def run_suite(row_counts: List[int], stages: List[str], data_dir: str, extension: str, seed: int) -> List[Dict[str, Any]]:
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for rows in row_counts:
+        dataset = ensure_dataset(data_dir, rows, seed, extension)
+        upload_dir = tempfile.mkdtemp(prefix='bench-')
+        try:
+            # Later stages work on the uploaded copy; without an upload stage, link the dataset in
+            uploaded = os.path.join(upload_dir, os.path.basename(dataset))
+            if 'upload' not in stages:
+                os.symlink(os.path.abspath(dataset), uploaded)
+            for stage in stages:
+                source = dataset if stage == 'upload' else uploaded
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_stage, stage, upload_dir, source, rows, seed).result()
+                results.append(result)
+                print(
+                    f"{rows_label(rows):>6} {stage:<11} {result['wall_seconds']:>9.3f}s "
+                    f"{result['rows_per_second']:>14,.0f} rows/s {result['peak_rss_mb']:>9.1f} MB",
+                    flush=True
+                )
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Return the stages whose rows/sec fell more than ``tolerance`` below the baseline report."""
+    previous = {(r['stage'], r['dataset_rows']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['stage'], result['dataset_rows']))
+        if before and before['rows_per_second'] and result['rows_per_second'] < before['rows_per_second'] * (1 - tolerance):
+            regressions.append({
+                'stage': result['stage'],
+                'dataset_rows': result['dataset_rows'],
+                'baseline_rows_per_second': before['rows_per_second'],
+                'rows_per_second': result['rows_per_second'],
+                'change': round(result['rows_per_second'] / before['rows_per_second'] - 1, 3),
+            })
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import pandas
+
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'pyarrow': pyarrow_version,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the ingestion benchmarks")
+    parser.add_argument('--rows', default='1m', help="Comma-separated dataset sizes, e.g. 1m,10m,100m")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument('--format', default='.csv', dest='extension',
+                        help="Dataset extension: .csv, .csv.gz, .csv.zst, .csv.lz4 or .parquet")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARKS_DIR, 'data'))
+    parser.add_argument('--output', help="Report path; defaults to benchmarks/reports/<timestamp>.json")
+    parser.add_argument('--baseline', help="Earlier report to compare rows/sec against")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Allowed rows/sec drop before a regression is reported")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGE_FUNCTIONS]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    # Keep the pipeline order whatever order the stages were given in
+    stages = [stage for stage in STAGES if stage in stages]
+    row_counts = [parse_rows(value) for value in args.rows.split(',')]
+
+    results = run_suite(row_counts, stages, args.data_dir, args.extension, args.seed)
+    report: Dict[str, Any] = {
+        'created_at': datetime.utcnow().isoformat(),
+        'environment': environment(),
+        'seed': args.seed,
+        'format': args.extension,
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(results, json.load(f), args.tolerance)
+
+    output = args.output or os.path.join(
+        BENCHMARKS_DIR, 'reports', f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {output}")
+
+    for regression in report.get('regressions', []):
+        print(
+            f"REGRESSION: {regression['stage']} at {rows_label(regression['dataset_rows'])} rows: "
+            f"{regression['rows_per_second']:,.0f} rows/s vs {regression['baseline_rows_per_second']:,.0f} "
+            f"({regression['change']:+.1%})"
+        )
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
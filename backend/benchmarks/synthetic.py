@@ -0,0 +1,185 @@
+"""Deterministic synthetic data shaped like ``uk.uk_price_paid``.
+
+    cd backend && python -m benchmarks.synthetic --rows 10m --output benchmarks/data/pp_10m.csv.gz
+"""
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from services.compression import Compressor, compression_from_extension
+
+COLUMNS = [
+    'price', 'date', 'postcode1', 'postcode2', 'type', 'is_new', 'duration',
+    'addr1', 'addr2', 'street', 'locality', 'town', 'district', 'county', 'category',
+]
+TYPES = np.array(['terraced', 'semi-detached', 'detached', 'flat', 'other'], dtype=object)
+TYPE_WEIGHTS = [0.3, 0.27, 0.23, 0.18, 0.02]
+DURATIONS = np.array(['freehold', 'leasehold'], dtype=object)
+# (town, district, county, postcode area)
+PLACES = [
+    ('LONDON', 'CITY OF WESTMINSTER', 'GREATER LONDON', 'SW'),
+    ('LONDON', 'CAMDEN', 'GREATER LONDON', 'NW'),
+    ('LONDON', 'HACKNEY', 'GREATER LONDON', 'E'),
+    ('MANCHESTER', 'MANCHESTER', 'GREATER MANCHESTER', 'M'),
+    ('SALFORD', 'SALFORD', 'GREATER MANCHESTER', 'M'),
+    ('BIRMINGHAM', 'BIRMINGHAM', 'WEST MIDLANDS', 'B'),
+    ('COVENTRY', 'COVENTRY', 'WEST MIDLANDS', 'CV'),
+    ('LEEDS', 'LEEDS', 'WEST YORKSHIRE', 'LS'),
+    ('BRADFORD', 'BRADFORD', 'WEST YORKSHIRE', 'BD'),
+    ('SHEFFIELD', 'SHEFFIELD', 'SOUTH YORKSHIRE', 'S'),
+    ('LIVERPOOL', 'LIVERPOOL', 'MERSEYSIDE', 'L'),
+    ('BRISTOL', 'CITY OF BRISTOL', 'CITY OF BRISTOL', 'BS'),
+    ('NOTTINGHAM', 'NOTTINGHAM', 'NOTTINGHAM', 'NG'),
+    ('LEICESTER', 'LEICESTER', 'LEICESTER', 'LE'),
+    ('NEWCASTLE UPON TYNE', 'NEWCASTLE UPON TYNE', 'TYNE AND WEAR', 'NE'),
+    ('BRIGHTON', 'BRIGHTON AND HOVE', 'BRIGHTON AND HOVE', 'BN'),
+    ('OXFORD', 'OXFORD', 'OXFORDSHIRE', 'OX'),
+    ('CAMBRIDGE', 'CAMBRIDGE', 'CAMBRIDGESHIRE', 'CB'),
+    ('YORK', 'YORK', 'YORK', 'YO'),
+    ('BATH', 'BATH AND NORTH EAST SOMERSET', 'BATH AND NORTH EAST SOMERSET', 'BA'),
+    ('EXETER', 'EXETER', 'DEVON', 'EX'),
+    ('NORWICH', 'NORWICH', 'NORFOLK', 'NR'),
+    ('READING', 'READING', 'READING', 'RG'),
+    ('CARDIFF', 'CARDIFF', 'CARDIFF', 'CF'),
+]
+STREETS = np.array([
+    'HIGH', 'CHURCH', 'STATION', 'MAIN', 'PARK', 'VICTORIA', 'GREEN', 'MANOR', 'KINGS', 'QUEENS',
+    'MILL', 'SCHOOL', 'NEW', 'NORTH', 'SOUTH', 'WEST', 'EAST', 'CHAPEL', 'ELM', 'OAK',
+])
+STREET_SUFFIXES = np.array([' STREET', ' ROAD', ' LANE', ' AVENUE', ' CLOSE', ' WAY'])
+LETTERS = np.array(list('ABDEFGHJLNPQRSTUWXYZ'))
+FIRST_DAY = np.datetime64('1995-01-01')
+DAYS = 30 * 365
+CHUNK_ROWS = 1_000_000
+
+
+def parse_rows(value: str) -> int:
+    """Parse ``1m``, ``250k`` or ``5000`` into a row count."""
+    value = value.strip().lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+def rows_label(rows: int) -> str:
+    for suffix, size in (('m', 1_000_000), ('k', 1_000)):
+        if rows >= size and rows % size == 0:
+            return f"{rows // size}{suffix}"
+    return str(rows)
+
+
+def _strings(values) -> np.ndarray:
+    return np.array(list(values), dtype=object)
+
+
+# Every string column draws from a small vocabulary, so rows are built by
+# indexing prebuilt arrays instead of formatting strings per row
+TOWNS, DISTRICTS, COUNTIES, AREAS = (_strings(values) for values in zip(*PLACES))
+POSTCODE_NUMBERS = 29
+POSTCODE1 = _strings(f"{area}{number}" for area in AREAS for number in range(1, POSTCODE_NUMBERS + 1))
+POSTCODE2 = _strings(f"{digit}{a}{b}" for digit in range(1, 10) for a in LETTERS for b in LETTERS)
+HOUSE_NUMBERS = _strings(str(number) for number in range(1, 300))
+FLAT_NUMBERS = _strings(f"FLAT {number}" for number in range(1, 60))
+STREET_NAMES = _strings(f"{street}{suffix}" for street in STREETS for suffix in STREET_SUFFIXES)
+DATES = _strings(str(FIRST_DAY + np.timedelta64(day, 'D')) for day in range(DAYS))
+
+
+def generate_frame(rows: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """Return ``rows`` synthetic sales; the same ``seed`` and ``start`` always give the same rows."""
+    rng = np.random.default_rng([seed, start])
+    places = rng.integers(0, len(PLACES), rows)
+    flats = rng.random(rows) < 0.15
+    return pd.DataFrame({
+        'price': np.clip(rng.lognormal(12.3, 0.6, rows), 1_000, 50_000_000).astype(np.uint32),
+        'date': DATES[rng.integers(0, DAYS, rows)],
+        'postcode1': POSTCODE1[places * POSTCODE_NUMBERS + rng.integers(0, POSTCODE_NUMBERS, rows)],
+        'postcode2': POSTCODE2[rng.integers(0, len(POSTCODE2), rows)],
+        'type': TYPES[rng.choice(len(TYPES), rows, p=TYPE_WEIGHTS)],
+        'is_new': (rng.random(rows) < 0.1).astype(np.uint8),
+        'duration': DURATIONS[(flats | (rng.random(rows) < 0.05)).astype(np.int8)],
+        'addr1': HOUSE_NUMBERS[rng.integers(0, len(HOUSE_NUMBERS), rows)],
+        'addr2': np.where(flats, FLAT_NUMBERS[rng.integers(0, len(FLAT_NUMBERS), rows)], ''),
+        'street': STREET_NAMES[rng.integers(0, len(STREET_NAMES), rows)],
+        'locality': np.where(rng.random(rows) < 0.7, TOWNS[places], ''),
+        'town': TOWNS[places],
+        'district': DISTRICTS[places],
+        'county': COUNTIES[places],
+        'category': (rng.random(rows) < 0.05).astype(np.uint8),
+    }, columns=COLUMNS)
+
+
+def to_csv_bytes(frame: pd.DataFrame) -> bytes:
+    """Render rows as header-less CSV, through pyarrow's writer when it is installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return frame.to_csv(header=False, index=False).encode()
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(frame, preserve_index=False),
+        sink,
+        pa_csv.WriteOptions(include_header=False, quoting_style='needed')
+    )
+    return sink.getvalue().to_pybytes()
+
+
+def write_dataset(file_path: str, rows: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS):
+    """Write ``rows`` synthetic sales to a CSV (compressed by extension) or Parquet file.
+
+    Rows are generated and written a chunk at a time, so memory stays flat
+    at any size. The file appears under its name only once complete.
+    """
+    tmp_path = f"{file_path}.tmp"
+    if file_path.endswith('.parquet'):
+        _write_parquet(tmp_path, rows, seed, chunk_rows)
+    else:
+        compressor = Compressor(compression_from_extension(file_path))
+        with open(tmp_path, 'wb') as f:
+            f.write(compressor.compress((','.join(COLUMNS) + '\n').encode()))
+            for start in range(0, rows, chunk_rows):
+                frame = generate_frame(min(chunk_rows, rows - start), seed, start)
+                f.write(compressor.compress(to_csv_bytes(frame)))
+            f.write(compressor.flush())
+    os.replace(tmp_path, file_path)
+
+
+def _write_parquet(file_path: str, rows: int, seed: int, chunk_rows: int):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for start in range(0, rows, chunk_rows):
+            table = pa.Table.from_pandas(generate_frame(min(chunk_rows, rows - start), seed, start), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(file_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def ensure_dataset(data_dir: str, rows: int, seed: int = 0, extension: str = '.csv') -> str:
+    """Return the path of the dataset for ``rows`` and ``seed``, generating it on first use."""
+    os.makedirs(data_dir, exist_ok=True)
+    file_path = os.path.join(data_dir, f"uk_price_paid_{rows_label(rows)}_s{seed}{extension}")
+    if not os.path.exists(file_path):
+        write_dataset(file_path, rows, seed)
+    return file_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic uk_price_paid file")
+    parser.add_argument('--rows', default='1m', help="Row count, e.g. 1m, 10m, 100m")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help="Target .csv, .csv.gz, .csv.zst, .csv.lz4 or .parquet file")
+    args = parser.parse_args()
+    write_dataset(args.output, parse_rows(args.rows), args.seed)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
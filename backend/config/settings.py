@@ -8,6 +8,14 @@ class Settings(BaseSettings):
     CLICKHOUSE_DATABASE: str = "default"
     CLICKHOUSE_USER: str = "default"
     CLICKHOUSE_PASSWORD: Optional[str] = None
+    CLICKHOUSE_POOL_SIZE: int = 8  # Clients per connection config
+    CLICKHOUSE_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free client
+    CLICKHOUSE_POOL_IDLE_CHECK_SECONDS: float = 30.0  # Ping clients idle for longer than this
+    METADATA_CACHE_TTL_SECONDS: float = 60.0  # Lifetime of cached table/column listings
+    METADATA_CACHE_MAX_ENTRIES: int = 1024
+    CLICKHOUSE_COMPRESSION: str = "lz4"  # Wire compression for query results and inserts: lz4, zstd, gzip or "" for none
+    SESSION_IDLE_SECONDS: float = 24 * 3600  # Sessions unused for longer than this are forgotten
+    MAX_SESSIONS: int = 1000  # Least recently used sessions are forgotten beyond this
     
     # JWT settings
     JWT_SECRET_KEY: str = "your-secret-key"
@@ -17,6 +25,45 @@ class Settings(BaseSettings):
     # File upload settings
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+
+    # Worker threads for blocking ClickHouse, pandas and file I/O calls
+    BLOCKING_WORKERS: int = 16
+
+    # Background jobs
+    MAX_CONCURRENT_JOBS: int = 2  # Further jobs queue until a slot frees up
+    JOB_HISTORY_SIZE: int = 100  # Finished jobs kept for status queries
+
+    # Opt-in request profiling, by X-Profile header or /api/profiles/arm
+    PROFILING_ENABLED: bool = False  # When off no profiling middleware is installed at all
+    PROFILE_MAX_CAPTURES: int = 20  # Oldest captures in UPLOAD_DIR/.profiles are deleted beyond this
+    PROFILE_TOP_N: int = 25  # Functions and allocation sites listed in each capture summary
+    PROFILE_TRACEMALLOC_FRAMES: int = 1  # Stack depth recorded per allocation
+
+    # Exported file paging
+    ROW_INDEX_STRIDE: int = 1000  # Record one byte offset every N rows in the .rowidx sidecar
+    FILE_PAGE_SIZE: int = 1000  # Default page size for /api/files/{id}
+
+    # Type inference for flat files
+    INFERENCE_HEAD_ROWS: int = 10_000  # Rows sampled from the start of the file
+    INFERENCE_STRIDES: int = 8  # Evenly spaced slices sampled from the rest of the file
+    INFERENCE_STRIDE_ROWS: int = 1_000
+    INFERENCE_INT_HEADROOM: int = 16  # Integer types must hold this multiple of the sampled range
+    LOW_CARDINALITY_MAX_DISTINCT: int = 10_000
+    LOW_CARDINALITY_MAX_RATIO: float = 0.1  # Distinct / non-null sampled values
+
+    # Tables created from imported files
+    AUTO_TABLE_ORDER_BY_COLUMNS: int = 3  # Most columns placed in the sorting key
+    AUTO_TABLE_MAX_PARTITIONS: int = 120  # Monthly partitions up to this many months of data, yearly beyond
+
+    # Partitioned exports
+    EXPORT_PARALLELISM: int = 4  # Shard queries in flight at once (also capped by CLICKHOUSE_POOL_SIZE)
+    EXPORT_RANGE_SAMPLE_SIZE: int = 10_000  # Key values sampled to pick range boundaries
+
+    # Import settings
+    IMPORT_CHUNK_ROWS: int = 100_000
+    IMPORT_CHUNK_BYTES: Optional[int] = None  # When set, chunks are split by size instead of row count
+    IMPORT_PARSE_PROCESSES: Optional[int] = None  # Worker processes for multi-file imports; defaults to the CPU count
+    IMPORT_MAX_CONCURRENT_INSERTS: int = 4  # INSERTs in flight across all workers of a multi-file import
     
     class Config:
         env_file = ".env"
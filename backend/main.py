@@ -1,17 +1,26 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routers import clickhouse, files
-from config.settings import Settings
+from routers import clickhouse, files, jobs, flatfile, profiles
+from config.settings import Settings, settings
 from services.clickhouse_service import ClickHouseService
 from services.flatfile_service import FlatFileService
 from models.clickhouse import ClickHouseConfig, TableInfo, ColumnInfo, JoinConditions, ExportResponse
-from models.flatfile import FileInfo, ColumnInfo, PreviewData
-from clickhouse_connect import get_client
-from typing import List, Dict, Any
+from models.flatfile import FileInfo, PreviewData
+from services.connection_manager import SESSION_HEADER, connection_manager
+from services import executor
+from services.metrics import CONTENT_TYPE, REQUEST_SECONDS, registry
+from services.profiling import ProfilingMiddleware
+from routers.dependencies import get_clickhouse_service, get_flatfile_service
+from typing import List, Dict, Any, Optional
 import os
+import time
 
 app = FastAPI(title="Data Ingestion Tool", version="1.0.0")
 
+# Allowance for multipart boundaries and headers around the uploaded file
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -19,71 +28,93 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id", SESSION_HEADER],
 )
 
 # Include routers
 app.include_router(clickhouse.router, prefix="/api/clickhouse", tags=["clickhouse"])
 app.include_router(files.router, prefix="/api", tags=["files"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(flatfile.router, prefix="/api/flatfile", tags=["flatfile"])
+app.include_router(profiles.router, prefix="/api/profiles", tags=["profiles"])
+
+# Only installed when switched on, so unprofiled deployments pay nothing per request
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
-# Initialize services
-clickhouse_client = None
-clickhouse_service = None
-flatfile_service = None
+@app.middleware("http")
+async def reject_oversize_uploads(request: Request, call_next):
+    # Refuse before the multipart body is read when the declared size is already too large
+    content_length = request.headers.get("content-length")
+    if request.url.path.endswith("/upload") and content_length:
+        try:
+            declared = int(content_length)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"detail": "Invalid Content-Length header"})
+        if declared > settings.MAX_FILE_SIZE + UPLOAD_OVERHEAD_BYTES:
+            return JSONResponse(status_code=413, content={"detail": f"File exceeds the {settings.MAX_FILE_SIZE} byte limit"})
+    return await call_next(request)
 
-@app.post("/clickhouse/connect", response_model=TableInfo)
-async def connect_clickhouse(config: ClickHouseConfig):
-    global clickhouse_client, clickhouse_service, flatfile_service
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
     try:
-        clickhouse_client = get_client(
-            host=config.host,
-            port=config.port,
-            database=config.database,
-            username=config.user,
-            password=config.password,
-            secure=config.secure,
-            verify=config.verify
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw path, to keep the series bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method, route=getattr(route, "path", "unmatched"), status=str(status)
         )
-        clickhouse_service = ClickHouseService(clickhouse_client)
-        flatfile_service = FlatFileService(clickhouse_client)
+
+@app.on_event("shutdown")
+def close_connection_pools():
+    connection_manager.close_all()
+    executor.shutdown()
+
+# Legacy routes, backed by the same session/pool registry as the routers
+@app.post("/clickhouse/connect")
+async def connect_clickhouse(config: ClickHouseConfig, response: Response, x_session_id: Optional[str] = Header(None)):
+    try:
+        await ClickHouseService().connect(config)
+        response.headers[SESSION_HEADER] = connection_manager.set_session_config(x_session_id, config)
         return {"status": "success", "message": "Connected to ClickHouse"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/clickhouse/tables", response_model=List[TableInfo])
-async def get_tables():
-    if not clickhouse_service:
-        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
+async def get_tables(clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     return await clickhouse_service.get_tables()
 
 @app.get("/clickhouse/tables/{table}/columns", response_model=List[ColumnInfo])
-async def get_columns(table: str):
-    if not clickhouse_service:
-        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
+async def get_columns(table: str, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     return await clickhouse_service.get_columns(table)
 
 @app.post("/clickhouse/export", response_model=ExportResponse)
-async def export_data(table_name: str = None, columns: List[str] = None, join_conditions: JoinConditions = None):
-    if not clickhouse_service:
-        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
+async def export_data(table_name: str = None, columns: List[str] = None, join_conditions: JoinConditions = None,
+                      clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     return await clickhouse_service.export_data(table_name, columns, join_conditions)
 
 @app.post("/flatfile/import")
-async def import_flatfile(file_path: str, table_name: str, columns: list[str], delimiter: str = ','):
-    if not flatfile_service:
-        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
-    return await flatfile_service.import_to_clickhouse(file_path, table_name, columns, delimiter)
+async def import_flatfile(file_path: str, table_name: str, columns: list[str], delimiter: str = ',',
+                          flatfile_service: FlatFileService = Depends(get_flatfile_service)):
+    return await flatfile_service.import_from_flatfile(table_name, file_path, columns)
 
 @app.get("/flatfile/files")
 async def get_exported_files():
-    if not flatfile_service:
-        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
-    return await flatfile_service.get_exported_files()
+    return await files.get_files()
 
 @app.get("/flatfile/files/{file_id}")
-async def get_file_data(file_id: str):
-    if not flatfile_service:
-        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
-    return await flatfile_service.get_file_data(file_id)
+async def get_file_data(file_id: int):
+    return await files.read_file_page(file_id)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
 
 @app.get("/")
 async def root():
@@ -31,6 +31,36 @@ class ExportRequest(BaseModel):
     columns: List[str]
     query: Optional[str] = None
     limit: Optional[int] = 100
+    stream: bool = False  # Export the full table to disk and return only `limit` preview rows
+    format: Optional[str] = None  # CSVWithNames, TSVWithNames, JSONEachRow (server-formatted raw bytes) or Parquet, Arrow; no preview rows
+    compression: Optional[str] = None  # gzip, zstd or lz4: compress the export file (and streamed bytes)
+    partitions: Optional[int] = None  # Split a full CSV export into this many shards queried in parallel
+    partition_by: str = "hash"  # hash (cityHash64 modulo), range (ORDER BY key ranges) or partition (table partitions)
+    partition_key: Optional[str] = None  # Expression to hash or range over; defaults to the table's sorting key
+    concat: bool = False  # Join the shards into one file afterwards
+    watermark_column: Optional[str] = None  # Export only rows past the last stored watermark of this column
+    incremental_mode: str = "delta"  # delta: a new file per run, append: add to one file
+    destination: Optional[str] = None  # Names the watermark state and output file (letters, digits, underscores); defaults to the table
+    shape: str = "records"  # Preview layout: records (an object per row), columns (an array per column) or rows (an array per row)
+
+class ImportRequest(BaseModel):
+    table_name: str
+    file_path: str
+    columns: List[str]
+    chunk_rows: Optional[int] = None
+    chunk_bytes: Optional[int] = None
+    resume: bool = True  # Continue from the checkpoint a failed import of this file left behind
+    create_table: bool = False  # Create a missing table from the file's inferred schema
+
+class BatchImportRequest(BaseModel):
+    table_name: str
+    path: str  # A directory (its files) or a glob pattern such as uploads/feed_*.csv.gz
+    columns: List[str]
+    chunk_rows: Optional[int] = None
+    chunk_bytes: Optional[int] = None
+    max_concurrent_inserts: Optional[int] = None
+    resume: bool = True
+    create_table: bool = False
 
 class Record(BaseModel):
     id: int
@@ -43,6 +73,10 @@ class ExportResponse(BaseModel):
     record_count: int
     file_path: str
     records: List[Dict[str, Any]]
+    columns: Optional[List[str]] = None  # Column names of `data`, for the columns and rows shapes
+    data: Optional[List[List[Any]]] = None  # Preview as per-column or per-row arrays, instead of `records`
+    files: List[str] = []  # Every file written, for partitioned exports
+    watermark: Optional[Any] = None  # Watermark reached by an incremental export
 
 class QueryConfig(BaseModel):
     table_name: str
@@ -55,4 +89,25 @@ class ExportResult(BaseModel):
     file_path: str
 
 class ImportResult(BaseModel):
-    record_count: int 
\ No newline at end of file
+    record_count: int
+    batch_count: int = 0
+    resumed_rows: int = 0  # Rows committed by an earlier, interrupted run and skipped this time
+    created_table: bool = False
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0 
+
+class FileImportResult(BaseModel):
+    file_path: str
+    record_count: int = 0
+    batch_count: int = 0
+    resumed_rows: int = 0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+
+class BatchImportResult(BaseModel):
+    files: List[FileImportResult]
+    record_count: int
+    failed_count: int
+    created_table: bool = False
+    elapsed_seconds: float
+    rows_per_second: float
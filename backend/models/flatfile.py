@@ -1,17 +1,32 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class FileInfo(BaseModel):
     filename: str
     file_path: str
     row_count: int
     column_count: int
+    size_bytes: int = 0
+    sha256: Optional[str] = None
 
 class ColumnInfo(BaseModel):
     name: str
-    type: str
+    type: str  # Proposed ClickHouse type
+    nullable: bool = False
+    low_cardinality: bool = False
+    sample_rows: int = 0
+    sample_distinct: int = 0
+    sample_min: Optional[str] = None  # Sampled range of date and time columns
+    sample_max: Optional[str] = None
+
+class TableDesign(BaseModel):
+    columns: List[ColumnInfo]
+    order_by: List[str]
+    partition_by: Optional[str] = None
+    ddl: str  # CREATE TABLE statement for the requested table name
 
 class PreviewData(BaseModel):
     data: List[Dict[str, Any]]
     columns: List[str]
-    total_rows: int 
\ No newline at end of file
+    total_rows: int
+    total_rows_estimated: bool = False 
\ No newline at end of file
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, completed, failed, cancelled
+    rows_processed: int = 0
+    bytes_processed: int = 0
+    rows_per_second: float = 0.0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
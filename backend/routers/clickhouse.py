@@ -1,77 +1,171 @@
-from fastapi import APIRouter, HTTPException, Depends
+import os
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Extra
-from services.clickhouse_service import ClickHouseService
-from models.clickhouse import ClickHouseConfig, TableInfo, ColumnInfo, QueryConfig, JoinConditions, ExportResponse, ExportRequest
-from clickhouse_connect import get_client
+from pydantic import BaseModel
+from services.clickhouse_service import ClickHouseService, COLUMNAR_EXPORT_FORMATS, EXPORT_FORMATS
+from models.clickhouse import ClickHouseConfig, TableInfo, ColumnInfo, QueryConfig, JoinConditions, ExportResponse, ExportRequest, ImportRequest, BatchImportRequest, BatchImportResult
+from services.compression import COMPRESSION_EXTENSIONS, MEDIA_TYPES
+from services.connection_manager import SESSION_HEADER, connection_manager
+from services.executor import run_blocking
+from services.serialization import FastJSONResponse
+from services.checkpoints import checkpoint_store
+from services.watermarks import watermark_store
+from routers.dependencies import get_clickhouse_service
 
 router = APIRouter()
-clickhouse_service = ClickHouseService()
 
 class ConnectionResponse(BaseModel):
     message: str
     tables: Optional[List[TableInfo]] = None
 
-class ImportRequest(BaseModel):
-    table_name: str
-    file_path: str
-    columns: List[str]
-
-class Record(BaseModel):
-    id: int
-    # Allow any additional fields
-    class Config:
-        extra = Extra.allow
-
-class ExportResponse(BaseModel):
-    message: str
-    record_count: int
-    file_path: str
-    records: List[Record]
-
 @router.post("/connect", response_model=List[TableInfo])
-async def connect_clickhouse(config: ClickHouseConfig):
+async def connect_clickhouse(config: ClickHouseConfig, response: Response, x_session_id: Optional[str] = Header(None)):
     try:
-        return await clickhouse_service.connect(config)
+        tables = await ClickHouseService().connect(config)
+        # Clients without a session get a new one and send it back on later requests
+        response.headers[SESSION_HEADER] = connection_manager.set_session_config(x_session_id, config)
+        return tables
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tables", response_model=List[TableInfo])
-async def get_tables():
+async def get_tables(clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     try:
         return await clickhouse_service.get_tables()
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tables/{table}/columns", response_model=List[ColumnInfo])
-async def get_columns(table: str):
+async def get_columns(table: str, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     try:
         return await clickhouse_service.get_columns(table)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.delete("/cache")
+async def invalidate_metadata_cache(table: Optional[str] = None, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
+    # For DDL run outside this tool; imports invalidate their target table themselves
+    clickhouse_service.invalidate_metadata(table)
+    return {"message": "Metadata cache invalidated"}
+
 @router.post("/export", response_model=ExportResponse)
-async def export_data(request: ExportRequest):
+async def export_data(request: ExportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
+    try:
+        result = await clickhouse_service.export_data(
+            table_name=request.table_name,
+            columns=request.columns,
+            join_conditions=None,
+            stream=request.stream,
+            limit=request.limit,
+            fmt=request.format,
+            compression=request.compression,
+            partitions=request.partitions,
+            partition_by=request.partition_by,
+            partition_key=request.partition_key,
+            concat=request.concat,
+            watermark_column=request.watermark_column,
+            incremental_mode=request.incremental_mode,
+            destination=request.destination,
+            shape=request.shape
+        )
+        # Encoded in the blocking pool; large previews would otherwise stall the event loop
+        return await run_blocking(FastJSONResponse, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/watermarks")
+async def list_watermarks():
+    return await run_blocking(watermark_store.list)
+
+@router.delete("/watermarks")
+async def reset_watermark(table: str, destination: Optional[str] = None):
+    # The next incremental export of this table and destination starts from scratch
+    if not await run_blocking(watermark_store.reset, table, destination or table):
+        raise HTTPException(status_code=404, detail="Watermark not found")
+    return {"message": "Watermark reset"}
+
+@router.post("/export/stream")
+async def stream_export(request: ExportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     try:
-        return await clickhouse_service.export_data(
+        chunks = await clickhouse_service.stream_export(
             table_name=request.table_name,
             columns=request.columns,
-            join_conditions=None
+            fmt=request.format,
+            compression=request.compression
         )
+        extension, media_type, _ = EXPORT_FORMATS[request.format] if request.format else ('.csv', 'text/csv', 1)
+        if request.compression and request.format not in COLUMNAR_EXPORT_FORMATS:
+            extension += COMPRESSION_EXTENSIONS[request.compression]
+            media_type = MEDIA_TYPES[request.compression]
+        filename = f"{request.table_name.replace('.', '_')}_export{extension}"
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/import")
-async def import_from_flatfile(request: ImportRequest):
+async def import_from_flatfile(request: ImportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
     try:
-        result = await ClickHouseService().import_from_flatfile(
+        result = await clickhouse_service.import_from_flatfile(
             request.table_name,
             request.file_path,
-            request.columns
+            request.columns,
+            chunk_rows=request.chunk_rows,
+            chunk_bytes=request.chunk_bytes,
+            resume=request.resume,
+            create_table=request.create_table
         )
         return {
             "message": "Data imported successfully",
-            "record_count": result.record_count
+            "record_count": result.record_count,
+            "batch_count": result.batch_count,
+            "resumed_rows": result.resumed_rows,
+            "created_table": result.created_table,
+            "elapsed_seconds": result.elapsed_seconds,
+            "rows_per_second": result.rows_per_second
         }
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e)) 
+
+@router.post("/import/batch", response_model=BatchImportResult)
+async def import_batch(request: BatchImportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
+    try:
+        return await clickhouse_service.import_batch(
+            request.table_name,
+            request.path,
+            request.columns,
+            chunk_rows=request.chunk_rows,
+            chunk_bytes=request.chunk_bytes,
+            max_concurrent_inserts=request.max_concurrent_inserts,
+            resume=request.resume,
+            create_table=request.create_table
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/import/checkpoints")
+async def list_checkpoints():
+    return await run_blocking(checkpoint_store.list)
+
+@router.delete("/import/checkpoints")
+async def reset_checkpoint(table: str, file_path: str):
+    # The next import of this file into this table starts from the first row
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not await run_blocking(checkpoint_store.reset, table, file_path):
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    return {"message": "Checkpoint reset"}
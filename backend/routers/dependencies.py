@@ -0,0 +1,12 @@
+from typing import Optional
+from fastapi import Header
+from services.clickhouse_service import ClickHouseService
+from services.flatfile_service import FlatFileService
+from services.connection_manager import connection_manager
+
+def get_clickhouse_service(x_session_id: Optional[str] = Header(None)) -> ClickHouseService:
+    # Bound to the session's config; clients are leased from the pool per operation
+    return ClickHouseService(config=connection_manager.get_session_config(x_session_id))
+
+def get_flatfile_service(x_session_id: Optional[str] = Header(None)) -> FlatFileService:
+    return FlatFileService(config=connection_manager.get_session_config(x_session_id))
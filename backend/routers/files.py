@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
 from pydantic import BaseModel
-import os
+from datetime import datetime
 from config.settings import settings
+from services.executor import run_blocking
+from services.file_index import file_manifest
+from services.row_index import read_page_columns
+from services.serialization import FastJSONResponse, shape_columns, validate_shape
 
 router = APIRouter()
 
@@ -11,55 +15,70 @@ class FileInfo(BaseModel):
     name: str
     path: str
     record_count: int
+    size_bytes: int = 0
+    modified_at: Optional[datetime] = None
+    columns: List[str] = []
+    source_table: Optional[str] = None
 
 @router.get("/files", response_model=List[FileInfo])
 async def get_files():
     try:
-        files = []
-        if not os.path.exists(settings.UPLOAD_DIR):
-            return []
-            
-        for idx, filename in enumerate(sorted(os.listdir(settings.UPLOAD_DIR), reverse=True)):
-            if filename.endswith('_export.csv'):
-                file_path = os.path.join(settings.UPLOAD_DIR, filename)
-                # Count lines in the file (excluding header)
-                with open(file_path, 'r') as f:
-                    record_count = sum(1 for line in f) - 1
-                
-                files.append({
-                    "id": idx + 1,
-                    "name": filename,
-                    "path": file_path,
-                    "record_count": record_count
-                })
-        
-        return files
+        return await run_blocking(_list_files)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _file_info(entry):
+    return {
+        "id": entry["id"],
+        "name": entry["name"],
+        "path": entry["path"],
+        "record_count": entry["record_count"],
+        "size_bytes": entry["size_bytes"],
+        "modified_at": datetime.fromtimestamp(entry["mtime"]),
+        "columns": entry.get("columns") or [],
+        "source_table": entry.get("source_table")
+    }
+
+def _page_response(file_info, offset: int, limit: int, shape: str, total: Optional[int]) -> FastJSONResponse:
+    columns, data, total = read_page_columns(file_info['path'], offset, limit, total)
+    next_offset = offset + (len(data[0]) if data else 0)
+    return FastJSONResponse({
+        "file_info": file_info,
+        **shape_columns(columns, data, shape, first_id=offset + 1),
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next_offset": next_offset if next_offset < total else None
+    })
+
+def _list_files():
+    # Served from the manifest; files are only re-read when they changed on disk
+    return [_file_info(entry) for entry in file_manifest.list()]
+
 @router.get("/files/{file_id}")
-async def get_file(file_id: int):
+async def get_file(
+    file_id: int,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    shape: str = Query("records", description="records (an object per row), columns (an array per column) or rows (an array per row)")
+):
+    return await read_file_page(file_id, offset, limit, shape)
+
+async def read_file_page(file_id: int, offset: int = 0, limit: Optional[int] = None, shape: str = "records"):
+    # Plain defaults, so other routes can call it without FastAPI resolving Query() objects
     try:
-        files = await get_files()
-        if not files or file_id > len(files):
+        validate_shape(shape)
+        entry = await run_blocking(file_manifest.get, file_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="File not found")
             
-        file_info = files[file_id - 1]
-        
-        # Read the file and return its contents
-        import pandas as pd
-        df = pd.read_csv(file_info['path'])
+        file_info = _file_info(entry)
+        limit = limit or settings.FILE_PAGE_SIZE
         
-        # Convert to list of dictionaries with id
-        records = []
-        for idx, row in df.iterrows():
-            record = row.to_dict()
-            record['id'] = idx + 1
-            records.append(record)
-        
-        return {
-            "file_info": file_info,
-            "records": records
-        }
+        # Seek straight to the requested page through the file's row-offset index
+        # Reading, shaping and encoding the page all stay off the event loop
+        return await run_blocking(_page_response, file_info, offset, limit, shape, entry.get('record_count'))
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,38 +1,54 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
+from typing import List, Optional
 from services.flatfile_service import FlatFileService
-from models.flatfile import FileInfo, ColumnInfo
+from models.flatfile import FileInfo, ColumnInfo, TableDesign
+from routers.dependencies import get_flatfile_service
 
 router = APIRouter()
-flatfile_service = FlatFileService()
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), flatfile_service: FlatFileService = Depends(get_flatfile_service)):
     try:
         file_info = await flatfile_service.save_file(file)
         return {
             "message": "File uploaded successfully",
             "file_info": file_info
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/columns/{filename}", response_model=List[ColumnInfo])
-async def get_file_columns(filename: str):
+async def get_file_columns(filename: str, flatfile_service: FlatFileService = Depends(get_flatfile_service)):
     try:
         return await flatfile_service.get_file_columns(filename)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/table-design/{filename}", response_model=TableDesign)
+async def get_table_design(
+    filename: str,
+    table_name: str,
+    columns: Optional[List[str]] = Query(None),
+    flatfile_service: FlatFileService = Depends(get_flatfile_service)
+):
+    # The DDL that import with create_table=True would run for this file
+    try:
+        return await flatfile_service.get_table_design(filename, table_name, columns)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/preview/{filename}")
-async def preview_file(filename: str, limit: int = 100):
+async def preview_file(filename: str, limit: int = 100, estimate: bool = False, flatfile_service: FlatFileService = Depends(get_flatfile_service)):
     try:
-        preview_data = await flatfile_service.preview_file(filename, limit)
+        preview_data = await flatfile_service.preview_file(filename, limit, estimate)
         return {
             "data": preview_data.data,
             "columns": preview_data.columns,
             "total_rows": preview_data.total_rows,
-            "row_count": preview_data.total_rows  # Added for frontend compatibility
+            "row_count": preview_data.total_rows,  # Added for frontend compatibility
+            "total_rows_estimated": preview_data.total_rows_estimated
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
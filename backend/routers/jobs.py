@@ -0,0 +1,88 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List
+from services.clickhouse_service import ClickHouseService
+from services.job_service import job_manager
+from models.clickhouse import BatchImportRequest, ExportRequest, ImportRequest
+from models.jobs import JobStatus, JobSubmitted
+from routers.dependencies import get_clickhouse_service
+
+router = APIRouter()
+
+def _require_connection(clickhouse_service: ClickHouseService):
+    if clickhouse_service.current_config is None:
+        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
+
+@router.post("/import", response_model=JobSubmitted, status_code=202)
+async def submit_import(request: ImportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
+    _require_connection(clickhouse_service)
+    job = job_manager.submit(
+        "import",
+        clickhouse_service._import_from_flatfile,
+        request.table_name,
+        request.file_path,
+        request.columns,
+        chunk_rows=request.chunk_rows,
+        chunk_bytes=request.chunk_bytes,
+        resume=request.resume,
+        create_table=request.create_table
+    )
+    return JobSubmitted(job_id=job.id, status=job.status)
+
+@router.post("/import/batch", response_model=JobSubmitted, status_code=202)
+async def submit_batch_import(request: BatchImportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
+    _require_connection(clickhouse_service)
+    job = job_manager.submit(
+        "import_batch",
+        clickhouse_service._import_batch,
+        request.table_name,
+        request.path,
+        request.columns,
+        chunk_rows=request.chunk_rows,
+        chunk_bytes=request.chunk_bytes,
+        max_concurrent_inserts=request.max_concurrent_inserts,
+        resume=request.resume,
+        create_table=request.create_table
+    )
+    return JobSubmitted(job_id=job.id, status=job.status)
+
+@router.post("/export", response_model=JobSubmitted, status_code=202)
+async def submit_export(request: ExportRequest, clickhouse_service: ClickHouseService = Depends(get_clickhouse_service)):
+    _require_connection(clickhouse_service)
+    # Background exports always write the full result to disk
+    job = job_manager.submit(
+        "export",
+        clickhouse_service._export_data,
+        request.table_name,
+        request.columns,
+        stream=True,
+        limit=request.limit,
+        fmt=request.format,
+        compression=request.compression,
+        partitions=request.partitions,
+        partition_by=request.partition_by,
+        partition_key=request.partition_key,
+        concat=request.concat,
+        watermark_column=request.watermark_column,
+        incremental_mode=request.incremental_mode,
+        destination=request.destination,
+        shape=request.shape
+    )
+    return JobSubmitted(job_id=job.id, status=job.status)
+
+@router.get("", response_model=List[JobStatus])
+async def list_jobs():
+    return [job.to_status() for job in job_manager.list()]
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_status()
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_status()
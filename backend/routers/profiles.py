@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from config.settings import settings
+from services.executor import run_blocking
+from services.profiling import profile_store
+
+def _require_profiling():
+    # The routes exist either way, but only answer when profiling is switched on
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+router = APIRouter(dependencies=[Depends(_require_profiling)])
+
+@router.get("")
+async def list_profiles():
+    return await run_blocking(profile_store.list)
+
+@router.post("/arm")
+async def arm_profiling(count: int = Query(1, ge=0, le=100), path_prefix: str = ""):
+    # Profile the next `count` requests under path_prefix; 0 disarms
+    profile_store.arm(count, path_prefix)
+    return profile_store.armed()
+
+@router.get("/arm")
+async def get_armed():
+    return profile_store.armed()
+
+@router.get("/{capture_id}")
+async def get_profile(capture_id: str):
+    summary = await run_blocking(profile_store.get, capture_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+@router.get("/{capture_id}/download")
+async def download_profile(capture_id: str):
+    path = await run_blocking(profile_store.profile_path, capture_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{capture_id}.prof")
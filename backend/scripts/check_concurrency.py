@@ -0,0 +1,124 @@
+"""Check that the API stays responsive while a large export is running.
+
+Runs the app in-process against a stand-in ClickHouse client whose export
+stream is deliberately slow, then polls /api/files and /api/clickhouse/tables
+while the export is in flight. Exits non-zero if any poll takes longer than
+MAX_LATENCY seconds.
+
+    cd backend && python scripts/check_concurrency.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from config.settings import settings
+import services.connection_manager as connection_manager_module
+
+EXPORT_BLOCKS = 30
+BLOCK_DELAY = 0.1  # Seconds the stand-in server takes per block
+MAX_LATENCY = 0.5
+
+
+class SlowQueryResult:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class SlowColumnType:
+    def __init__(self, name):
+        self.name = name
+
+
+class SlowSource:
+    column_types = [SlowColumnType('UInt32'), SlowColumnType('Date'), SlowColumnType('LowCardinality(String)')]
+
+
+class SlowBlockStream:
+    source = SlowSource()
+
+    def __init__(self, blocks, delay):
+        self.blocks = blocks
+        self.delay = delay
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for block in range(self.blocks):
+            time.sleep(self.delay)
+            yield [[100000 + i for i in range(1000)], [date(2023, 1, 1)] * 1000, ['SW1A'] * 1000]
+
+
+class SlowClient:
+    """Stand-in for a clickhouse_connect client with a slow, blocking export."""
+
+    def query(self, query, parameters=None, **kwargs):
+        if 'system.tables' in query:
+            return SlowQueryResult([('uk.uk_price_paid', 'MergeTree', EXPORT_BLOCKS * 1000)])
+        return SlowQueryResult([])
+
+    def query_column_block_stream(self, query, **kwargs):
+        return SlowBlockStream(EXPORT_BLOCKS, BLOCK_DELAY)
+
+    def ping(self):
+        return True
+
+    def close(self):
+        pass
+
+
+async def main() -> int:
+    settings.UPLOAD_DIR = tempfile.mkdtemp()
+    connection_manager_module.get_client = lambda **kwargs: SlowClient()
+
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        connected = await client.post("/api/clickhouse/connect", json={
+            "host": "localhost", "port": 8123, "user": "default", "password": "", "database": "default"
+        })
+        # Later requests use the session /connect issued, as the frontend does
+        client.headers["X-Session-Id"] = connected.headers["X-Session-Id"]
+
+        export = asyncio.create_task(client.post("/api/clickhouse/export", json={
+            "table_name": "uk.uk_price_paid", "columns": ["price", "date", "postcode1"], "stream": True
+        }))
+        await asyncio.sleep(0.2)
+
+        latencies = []
+        while not export.done():
+            for path in ("/api/files", "/api/clickhouse/tables"):
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((path, time.perf_counter() - start, response.status_code))
+            await asyncio.sleep(0.1)
+
+        result = (await export).json()
+
+    worst = max(latencies, key=lambda item: item[1]) if latencies else None
+    print(f"Export finished: {result.get('record_count')} records")
+    print(f"Polled {len(latencies)} requests during the export")
+    if worst is None:
+        print("FAIL: export finished before any request could be polled")
+        return 1
+    print(f"Slowest: {worst[0]} took {worst[1] * 1000:.1f} ms")
+    if worst[1] > MAX_LATENCY or any(status != 200 for _, _, status in latencies):
+        print("FAIL: API was blocked while the export was running")
+        return 1
+    print("OK: API stayed responsive")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
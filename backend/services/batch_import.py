@@ -0,0 +1,251 @@
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from models.clickhouse import ClickHouseConfig, FileImportResult
+from services.checkpoints import CheckpointStore, ImportCheckpoint
+from services.columnar_io import detect_columnar, iter_tables
+from services.connection_manager import create_client
+from services.file_index import MANIFEST_NAME, file_sha256
+from services.flatfile_io import chunk_sizes, csv_dtypes, iter_csv_chunks_with_offsets, parse_temporal, temporal_columns
+from services.job_service import JobProgress
+from services.metrics import BYTES_PROCESSED, ROWS_PROCESSED, StageTimer
+from services.row_index import INDEX_SUFFIX
+
+
+def insert_file(
+    client,
+    table_name: str,
+    file_path: str,
+    columns: List[str],
+    chunk_rows: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+    progress: Optional[JobProgress] = None,
+    insert_slot: Callable[[], ContextManager] = nullcontext,
+    checkpoint: Optional[ImportCheckpoint] = None,
+    column_types: Optional[Dict[str, str]] = None
+) -> Tuple[int, int]:
+    """Parse ``file_path`` in bounded chunks and insert each one; return ``(records, batches)``.
+
+    CSV chunks go in through insert_df, Parquet and Arrow batches through
+    insert_arrow. Each INSERT runs inside ``insert_slot()``, which lets callers
+    cap how many are in flight at once.
+
+    With a ``checkpoint`` the import starts after its last committed chunk,
+    uses its chunk sizes, tags every INSERT with a deduplication token and
+    commits the checkpoint once the INSERT returned. Counts cover only the
+    rows inserted by this call.
+
+    ``column_types`` maps the target table's columns to their ClickHouse
+    types; every CSV chunk is parsed with the dtypes derived from them, so a
+    column's type does not depend on which rows a chunk happens to hold, and
+    its Date and DateTime columns are converted before the INSERT.
+    """
+    record_count = 0
+    batch_count = 0
+    start_row = checkpoint.rows if checkpoint else 0
+    if checkpoint:
+        chunk_rows, chunk_bytes = checkpoint.chunk_rows, checkpoint.chunk_bytes
+    chunk_rows, chunk_bytes = chunk_sizes(chunk_rows, chunk_bytes)
+
+    def insert_settings(rows: int) -> Dict[str, Any]:
+        if checkpoint is None:
+            return {}
+        row = start_row + record_count
+        return {'insert_deduplication_token': checkpoint.token(row, row + rows)}
+
+    with StageTimer('import') as timer:
+        if detect_columnar(file_path):
+            # Typed Arrow batches go straight to ClickHouse, no text parsing
+            skipped = 0
+            for table in timer.iterate('read', iter_tables(file_path, columns, chunk_rows)):
+                if skipped < start_row:
+                    # Batches are cut the same way on every run, so whole ones were committed
+                    skipped += table.num_rows
+                    continue
+                if progress:
+                    progress.check_cancelled()
+                with insert_slot(), timer.stage('insert'):
+                    client.insert_arrow(table_name, table, settings=insert_settings(table.num_rows))
+                record_count += table.num_rows
+                batch_count += 1
+                if checkpoint:
+                    with timer.stage('checkpoint'):
+                        checkpoint.commit(start_row + record_count, 0)
+                timer.count(table.num_rows, table.nbytes)
+                if progress:
+                    progress.advance(table.num_rows, table.nbytes)
+            return record_count, batch_count
+
+        offset = checkpoint.offset if checkpoint else 0
+        chunks = iter_csv_chunks_with_offsets(
+            file_path, columns, chunk_rows, chunk_bytes,
+            start_offset=offset, start_row=start_row if not chunk_bytes else 0, dtype=csv_dtypes(column_types)
+        )
+        dates = temporal_columns(column_types)
+        for chunk, end_offset in timer.iterate('parse', chunks):
+            if progress:
+                progress.check_cancelled()
+            if dates:
+                with timer.stage('parse'):
+                    chunk = parse_temporal(chunk, dates)
+            # Insert column-oriented straight from the DataFrame's typed
+            # arrays instead of materialising a tuple per row
+            with insert_slot(), timer.stage('insert'):
+                client.insert_df(table_name, chunk, column_names=columns, settings=insert_settings(len(chunk)))
+            record_count += len(chunk)
+            batch_count += 1
+            if checkpoint:
+                with timer.stage('checkpoint'):
+                    checkpoint.commit(start_row + record_count, end_offset if chunk_bytes else 0)
+            timer.count(len(chunk), end_offset - offset)
+            if progress:
+                progress.advance(len(chunk), end_offset - offset)
+            offset = end_offset
+        return record_count, batch_count
+
+
+def resolve_files(path: str) -> List[str]:
+    """Expand a directory (its direct entries) or a glob pattern into a sorted list of files."""
+    if os.path.isdir(path):
+        candidates = [os.path.join(path, name) for name in os.listdir(path)]
+    else:
+        candidates = glob.glob(path, recursive=True)
+    return sorted(
+        candidate for candidate in candidates
+        if os.path.isfile(candidate)
+        and not os.path.basename(candidate).startswith('.')
+        and os.path.basename(candidate) != MANIFEST_NAME
+        and not candidate.endswith(INDEX_SUFFIX)
+    )
+
+
+# State of each worker process, set up by _init_worker; the client is opened on first use
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(
+    config: ClickHouseConfig,
+    slots,
+    client_factory: Callable[[ClickHouseConfig], Any],
+    checkpoint_dir: Optional[str] = None
+):
+    _worker_state.update(
+        config=config, slots=slots, client_factory=client_factory, client=None,
+        checkpoints=CheckpointStore(checkpoint_dir, hash_file=file_sha256) if checkpoint_dir else None
+    )
+
+
+def _worker_client():
+    if _worker_state["client"] is None:
+        _worker_state["client"] = _worker_state["client_factory"](_worker_state["config"])
+    return _worker_state["client"]
+
+
+def _import_file(
+    table_name: str,
+    file_path: str,
+    columns: List[str],
+    chunk_rows: Optional[int],
+    chunk_bytes: Optional[int],
+    resume: bool = True,
+    column_types: Optional[Dict[str, str]] = None
+) -> FileImportResult:
+    """Runs in a worker process: parse and insert one file, reporting errors instead of raising."""
+    start = time.perf_counter()
+    checkpoint = None
+    try:
+        if _worker_state["checkpoints"] is not None:
+            checkpoint = _worker_state["checkpoints"].open(
+                table_name, file_path, columns, chunk_rows, chunk_bytes, resume
+            )
+        record_count, batch_count = insert_file(
+            _worker_client(), table_name, file_path, columns, chunk_rows, chunk_bytes,
+            insert_slot=lambda: _worker_state["slots"], checkpoint=checkpoint, column_types=column_types
+        )
+        if checkpoint:
+            checkpoint.clear()
+        error = None
+    except Exception as e:
+        record_count, batch_count, error = 0, 0, str(e)
+    return FileImportResult(
+        file_path=file_path,
+        record_count=record_count,
+        batch_count=batch_count,
+        resumed_rows=checkpoint.resumed_rows if checkpoint else 0,
+        elapsed_seconds=round(time.perf_counter() - start, 3),
+        error=error
+    )
+
+
+def import_files(
+    config: ClickHouseConfig,
+    table_name: str,
+    files: List[str],
+    columns: List[str],
+    chunk_rows: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+    max_concurrent_inserts: Optional[int] = None,
+    progress: Optional[JobProgress] = None,
+    client_factory: Callable[[ClickHouseConfig], Any] = create_client,
+    checkpoints: Optional[CheckpointStore] = None,
+    resume: bool = True,
+    column_types: Optional[Dict[str, str]] = None
+) -> List[FileImportResult]:
+    """Import ``files`` in parallel worker processes; results come back in ``files`` order.
+
+    Each process parses whole files with its own ClickHouse client, so parsing
+    scales with cores. A semaphore shared by all processes caps the INSERTs
+    in flight at ``max_concurrent_inserts``. Processes are spawned rather
+    than forked so they never inherit the parent's pooled sockets or threads.
+    With ``checkpoints`` every file keeps its own checkpoint, so a failed or
+    cancelled run resumes each file where it stopped.
+    """
+    if not files:
+        return []
+    context = multiprocessing.get_context("spawn")
+    slots = context.Semaphore(max_concurrent_inserts or settings.IMPORT_MAX_CONCURRENT_INSERTS)
+    workers = min(settings.IMPORT_PARSE_PROCESSES or os.cpu_count() or 1, len(files))
+    results = {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(config, slots, client_factory, checkpoints.directory if checkpoints else None)
+    ) as pool:
+        pending = {
+            pool.submit(
+                _import_file, table_name, file_path, columns, chunk_rows, chunk_bytes, resume, column_types
+            ): file_path
+            for file_path in files
+        }
+        try:
+            while pending:
+                if progress:
+                    progress.check_cancelled()
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The worker process itself died
+                        result = FileImportResult(file_path=file_path, error=str(e) or type(e).__name__)
+                    results[file_path] = result
+                    # Stage timings stay in the worker processes; their rows are counted here
+                    ROWS_PROCESSED.inc(result.record_count, operation='import')
+                    if result.error is None:
+                        BYTES_PROCESSED.inc(os.path.getsize(file_path), operation='import')
+                    if progress:
+                        progress.advance(result.record_count, os.path.getsize(file_path))
+        except BaseException:
+            # Files already being parsed finish; queued ones never start
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return [results[file_path] for file_path in files]
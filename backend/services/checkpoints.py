@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from services.file_index import content_hash
+from services.flatfile_io import chunk_sizes
+
+CHECKPOINT_DIR = ".checkpoints"
+
+
+class ImportCheckpoint:
+    """Progress of importing one file into one table, saved after every committed chunk.
+
+    ``rows`` and ``offset`` mark where the last committed chunk ended; the
+    offset counts (decompressed) bytes and is only set for byte-sized CSV
+    chunks. The chunk sizes are stored too, so a resumed import cuts the
+    remaining chunks exactly as the first run would have.
+    """
+
+    def __init__(self, path: str, data: Dict[str, Any]):
+        self.path = path
+        self.data = data
+        self.resumed_rows = data["rows"]
+
+    @property
+    def rows(self) -> int:
+        return self.data["rows"]
+
+    @property
+    def offset(self) -> int:
+        return self.data["offset"]
+
+    @property
+    def chunk_rows(self) -> int:
+        return self.data["chunk_rows"]
+
+    @property
+    def chunk_bytes(self) -> Optional[int]:
+        return self.data["chunk_bytes"]
+
+    def token(self, start_row: int, end_row: int) -> str:
+        """Deduplication token for the chunk holding rows ``[start_row, end_row)``.
+
+        It depends on the run, the file content, the column selection and the
+        row range. Re-sending a chunk after a crash within the same run yields
+        the same token and ClickHouse drops the repeated block, while a fresh
+        import of the same file (after a TRUNCATE, or with ``resume=False``)
+        gets a new run id and is inserted again.
+        """
+        columns = hashlib.sha256("\0".join(self.data["columns"]).encode()).hexdigest()[:8]
+        token = f"{self.data['file_sha256'][:32]}-{columns}-{start_row}-{end_row}"
+        # Checkpoints saved before run ids existed resume with the tokens they started with
+        run_id = self.data.get("run_id")
+        return f"{run_id}-{token}" if run_id else token
+
+    def commit(self, rows: int, offset: int, batches: int = 1):
+        self.data.update(
+            rows=rows,
+            offset=offset,
+            batches=self.data["batches"] + batches,
+            updated_at=datetime.utcnow().isoformat()
+        )
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class CheckpointStore:
+    """Import checkpoints in ``.checkpoints/``, one JSON file per (table, file content).
+
+    Keeping each checkpoint in its own file lets the worker processes of a
+    multi-file import save theirs without coordinating. Those workers pass
+    a ``hash_file`` that does not write to the shared file manifest.
+    """
+
+    def __init__(self, directory: Optional[str] = None, hash_file: Callable[[str], str] = content_hash):
+        self._directory = directory
+        self._hash_file = hash_file
+
+    @property
+    def directory(self) -> str:
+        return self._directory or os.path.join(settings.UPLOAD_DIR, CHECKPOINT_DIR)
+
+    def _path(self, table_name: str, file_sha256: str) -> str:
+        key = hashlib.sha256(f"{table_name}\0{file_sha256}".encode()).hexdigest()[:24]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def open(
+        self,
+        table_name: str,
+        file_path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None,
+        resume: bool = True
+    ) -> ImportCheckpoint:
+        """Return the checkpoint to continue from, or a fresh one.
+
+        A stored checkpoint is only resumed when the file content and the
+        column selection are unchanged; its chunk sizes and run id then win
+        over the requested ones. A fresh checkpoint starts a new run.
+        """
+        file_sha256 = self._hash_file(file_path)
+        path = self._path(table_name, file_sha256)
+        if resume:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data["columns"] == list(columns):
+                    return ImportCheckpoint(path, data)
+            except (OSError, ValueError, KeyError):
+                pass
+
+        os.makedirs(self.directory, exist_ok=True)
+        chunk_rows, chunk_bytes = chunk_sizes(chunk_rows, chunk_bytes)
+        return ImportCheckpoint(path, {
+            "run_id": uuid.uuid4().hex,
+            "table": table_name,
+            "file_path": file_path,
+            "file_sha256": file_sha256,
+            "columns": list(columns),
+            "chunk_rows": chunk_rows,
+            "chunk_bytes": chunk_bytes,
+            "rows": 0,
+            "offset": 0,
+            "batches": 0,
+            "updated_at": datetime.utcnow().isoformat()
+        })
+
+    def list(self) -> List[Dict[str, Any]]:
+        entries = []
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def reset(self, table_name: str, file_path: str) -> bool:
+        path = self._path(table_name, self._hash_file(file_path))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+
+checkpoint_store = CheckpointStore()
@@ -1,53 +1,83 @@
-from clickhouse_connect import get_client
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 import pandas as pd
-from models.clickhouse import ClickHouseConfig, TableInfo, ColumnInfo, QueryConfig, JoinConditions, ExportResponse
+from models.clickhouse import ClickHouseConfig, TableInfo, ColumnInfo, QueryConfig, JoinConditions, ExportResponse, ImportResult, BatchImportResult
+from services.checkpoints import checkpoint_store
+from services.batch_import import import_files, insert_file, resolve_files
+from services.columnar_io import ARROW_CODECS, COLUMNAR_FORMATS, ColumnarWriter, empty_schema
+from services.compression import COMPRESSION_EXTENSIONS, Compressor, validate_compression
+from services.connection_manager import config_key, leased_client
+from services.executor import run_blocking
+from services.file_index import file_manifest
+from services.job_service import JobCancelled, JobProgress
+from services.metadata_cache import TABLES_KEY, metadata_cache
+from services.metrics import StageTimer
+from services.profiling import profile_iterator
+from services.serialization import shape_columns, validate_shape
+from services.table_design import design_table, quote_table
+from services.value_conversion import BlockConverter, result_types
+from services.watermarks import watermark_store
 from config.settings import settings
+import csv
+import io
 import os
 import re
 from fastapi import HTTPException
+import shutil
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+
+# Formats ClickHouse can serialise server-side: (file extension, media type, header lines)
+RAW_EXPORT_FORMATS = {
+    'CSVWithNames': ('.csv', 'text/csv', 1),
+    'TSVWithNames': ('.tsv', 'text/tab-separated-values', 1),
+    'JSONEachRow': ('.jsonl', 'application/x-ndjson', 0),
+}
+# Formats written from Arrow result batches: format name -> columnar_io format
+COLUMNAR_EXPORT_FORMATS = {
+    'Parquet': 'parquet',
+    'Arrow': 'arrow',
+}
+EXPORT_FORMATS = {
+    **RAW_EXPORT_FORMATS,
+    **{name: COLUMNAR_FORMATS[kind] + (0,) for name, kind in COLUMNAR_EXPORT_FORMATS.items()},
+}
+RAW_CHUNK_SIZE = 1024 * 1024
+INCREMENTAL_MODES = ('delta', 'append')
+# Incremental export destinations become part of a file name in UPLOAD_DIR
+DESTINATION_RE = re.compile(r'^[A-Za-z0-9_]+$')
+PARTITION_STRATEGIES = ('hash', 'range', 'partition')
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
 
 class ClickHouseService:
-    def __init__(self):
-        self.client = None
-        self.current_config = None
+    def __init__(self, client=None, config: Optional[ClickHouseConfig] = None):
+        # Either a dedicated client, or a config whose pooled clients are
+        # leased per operation through the connection manager
+        self.client = client
+        self.current_config = config
+
+    def _connection(self):
+        return leased_client(self.client, self.current_config)
 
     async def connect(self, config: ClickHouseConfig) -> List[TableInfo]:
-        try:
-            # Create client with provided config
-            self.client = get_client(
-                host=config.host,
-                port=config.port,
-                username=config.user,
-                password=config.password,
-                database=config.database
-            )
-            self.current_config = config
-            
-            # Get tables from all databases except system
-            query = """
-            SELECT concat(database, '.', name) as table_name, engine, total_rows
-            FROM system.tables
-            WHERE database NOT IN ('system', 'information_schema')
-            ORDER BY table_name
-            """
-            result = self.client.query(query)
-            return [
-                TableInfo(
-                    name=row[0],
-                    engine=row[1],
-                    row_count=row[2] if row[2] is not None else 0
-                )
-                for row in result.result_rows
-            ]
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+        return await run_blocking(self._connect, config)
+
+    def _connect(self, config: ClickHouseConfig) -> List[TableInfo]:
+        self.current_config = config
+        # A (re)connect always starts from fresh metadata
+        metadata_cache.invalidate(self._cache_key())
+        return self._get_tables()
 
     async def get_table_columns(self, table_name: str) -> List[ColumnInfo]:
-        if not self.client:
-            raise Exception("Not connected to ClickHouse")
-            
+        return await run_blocking(self._get_table_columns, table_name)
+
+    def _get_table_columns(self, table_name: str) -> List[ColumnInfo]:
         try:
             # Split database and table name
             db_table = table_name.split('.')
@@ -57,30 +87,7 @@ class ClickHouseService:
             database, table = db_table
             print(f"Getting columns for {database}.{table}")
             
-            result = self.client.query("""
-                SELECT 
-                    name,
-                    type,
-                    default_kind,
-                    default_expression
-                FROM system.columns 
-                WHERE database = %(database)s AND table = %(table)s
-            """, parameters={
-                'database': database,
-                'table': table
-            })
-            
-            print("Columns query result:", result.result_rows)
-            
-            columns = [
-                ColumnInfo(
-                    name=col[0],
-                    type=col[1],
-                    default_kind=col[2],
-                    default_expression=col[3]
-                )
-                for col in result.result_rows
-            ]
+            columns = self._get_columns(table_name)
             
             print("Processed columns:", columns)
             return columns
@@ -90,72 +97,181 @@ class ClickHouseService:
             raise Exception(f"Failed to get columns: {str(e)}")
 
     async def export_to_flatfile(self, query_config: QueryConfig) -> Dict[str, Any]:
-        if not self.client:
-            raise Exception("Not connected to ClickHouse")
-            
+        return await run_blocking(self._export_to_flatfile, query_config)
+
+    def _export_to_flatfile(self, query_config: QueryConfig) -> Dict[str, Any]:
         try:
             print(f"Executing query: {query_config.query}")
-            # Execute query and get data
-            result = self.client.query(query_config.query)
-            
-            print(f"Query result: {len(result.result_rows)} rows")
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(result.result_rows, columns=query_config.columns)
-            
-            # Create output directory if it doesn't exist
-            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-            
-            # Save to CSV
             output_path = os.path.join(settings.UPLOAD_DIR, f"{query_config.table_name}_export.csv")
-            df.to_csv(output_path, index=False)
-            
-            # Convert records to list of dictionaries with id
-            records = []
-            for idx, row in enumerate(result.result_rows):
-                record = dict(zip(query_config.columns, row))
-                record['id'] = idx + 1  # Add 1-based id for each record
-                records.append(record)
+
+            # Stream blocks straight to disk, keeping only a bounded preview
+            record_count, preview = self.write_query_to_csv(
+                query_config.query,
+                query_config.columns,
+                output_path,
+                preview_limit=query_config.limit or 100
+            )
+            print(f"Query result: {record_count} rows")
+            file_manifest.record(
+                output_path, "export", record_count, columns=query_config.columns, source_table=query_config.table_name
+            )
             
             return {
                 "message": "Data exported successfully",
-                "record_count": len(records),
+                "record_count": record_count,
                 "file_path": output_path,
-                "records": records
+                # 1-based id for each record
+                "records": shape_columns(query_config.columns, preview, 'records', first_id=1)['records']
             }
         except Exception as e:
             print(f"Error in export_to_flatfile: {str(e)}")
             raise Exception(f"Failed to export data: {str(e)}")
 
-    async def import_from_flatfile(self, table_name: str, file_path: str, columns: List[str]):
-        if not self.client:
-            raise Exception("Not connected to ClickHouse")
-            
+    async def import_from_flatfile(
+        self,
+        table_name: str,
+        file_path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None,
+        resume: bool = True,
+        create_table: bool = False
+    ) -> ImportResult:
+        return await run_blocking(
+            self._import_from_flatfile, table_name, file_path, columns, chunk_rows, chunk_bytes,
+            resume=resume, create_table=create_table
+        )
+
+    def _import_from_flatfile(
+        self,
+        table_name: str,
+        file_path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None,
+        progress: Optional[JobProgress] = None,
+        resume: bool = True,
+        create_table: bool = False
+    ) -> ImportResult:
+        """Import a flat file chunk by chunk, checkpointing after every committed chunk.
+
+        A failed or cancelled import leaves its checkpoint behind and the next
+        import of the same file into the same table continues from it, unless
+        ``resume`` is False. Chunks carry deduplication tokens, so the chunk
+        that was in flight when the import died is not inserted twice. With
+        ``create_table`` a missing table is first created from the file's
+        inferred schema.
+        """
         try:
-            # Read CSV file
-            df = pd.read_csv(file_path)
-            
-            # Select only specified columns
-            df = df[columns]
-            
-            # Convert DataFrame to list of tuples for insertion
-            data = [tuple(x) for x in df.to_numpy()]
-            
-            # Insert data into ClickHouse
-            self.client.insert(
-                table_name,
-                data,
-                column_names=columns
+            start = time.perf_counter()
+            checkpoint = checkpoint_store.open(table_name, file_path, columns, chunk_rows, chunk_bytes, resume)
+
+            created = False
+            if create_table:
+                with self._connection() as client:
+                    created = self._create_table_if_missing(client, table_name, file_path, columns)
+            column_types = self._column_types(table_name)
+
+            with self._connection() as client:
+                record_count, batch_count = insert_file(
+                    client, table_name, file_path, columns, chunk_rows, chunk_bytes, progress,
+                    checkpoint=checkpoint, column_types=column_types
+                )
+            checkpoint.clear()
+
+            # Row counts (and possibly the schema) changed
+            self.invalidate_metadata(table_name)
+            file_manifest.record_import(file_path, table_name)
+
+            elapsed = time.perf_counter() - start
+            return ImportResult(
+                record_count=record_count,
+                batch_count=batch_count,
+                resumed_rows=checkpoint.resumed_rows,
+                created_table=created,
+                elapsed_seconds=round(elapsed, 3),
+                rows_per_second=round(record_count / elapsed, 1) if elapsed > 0 else 0.0
             )
-            
-            return {
-                "record_count": len(data)
-            }
+        except JobCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Failed to import data: {str(e)}")
 
+    async def import_batch(
+        self,
+        table_name: str,
+        path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None,
+        max_concurrent_inserts: Optional[int] = None,
+        resume: bool = True,
+        create_table: bool = False
+    ) -> BatchImportResult:
+        return await run_blocking(
+            self._import_batch, table_name, path, columns, chunk_rows, chunk_bytes, max_concurrent_inserts,
+            resume=resume, create_table=create_table
+        )
+
+    def _import_batch(
+        self,
+        table_name: str,
+        path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None,
+        max_concurrent_inserts: Optional[int] = None,
+        progress: Optional[JobProgress] = None,
+        resume: bool = True,
+        create_table: bool = False
+    ) -> BatchImportResult:
+        """Import every file in a directory or matching a glob, in parallel worker processes.
+
+        A failing file does not stop the others; its error is reported in its
+        own result. With ``create_table`` a missing table is designed from the
+        first file.
+        """
+        if self.current_config is None:
+            raise HTTPException(status_code=400, detail="Multi-file imports need a connection config")
+        files = resolve_files(path)
+        if not files:
+            raise HTTPException(status_code=400, detail=f"No files match '{path}'")
+
+        start = time.perf_counter()
+        created = False
+        if create_table:
+            with self._connection() as client:
+                created = self._create_table_if_missing(client, table_name, files[0], columns)
+        results = import_files(
+            self.current_config, table_name, files, columns,
+            chunk_rows, chunk_bytes, max_concurrent_inserts, progress,
+            checkpoints=checkpoint_store, resume=resume, column_types=self._column_types(table_name)
+        )
+        self.invalidate_metadata(table_name)
+        for result in results:
+            if result.error is None:
+                file_manifest.record_import(result.file_path, table_name)
+
+        elapsed = time.perf_counter() - start
+        record_count = sum(result.record_count for result in results)
+        return BatchImportResult(
+            files=results,
+            record_count=record_count,
+            failed_count=sum(1 for result in results if result.error is not None),
+            created_table=created,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(record_count / elapsed, 1) if elapsed > 0 else 0.0
+        )
+
     async def get_tables(self) -> List[TableInfo]:
+        return await run_blocking(self._get_tables)
+
+    def _get_tables(self) -> List[TableInfo]:
         try:
+            cached = metadata_cache.get(self._cache_key(), TABLES_KEY)
+            if cached is not None:
+                return list(cached)
+
             # Get tables from all databases except system
             query = """
             SELECT concat(database, '.', name) as table_name, engine, total_rows
@@ -163,8 +279,9 @@ class ClickHouseService:
             WHERE database NOT IN ('system', 'information_schema')
             ORDER BY table_name
             """
-            result = self.client.query(query)
-            return [
+            with self._connection() as client:
+                result = client.query(query)
+            tables = [
                 TableInfo(
                     name=row[0],
                     engine=row[1],
@@ -172,118 +289,812 @@ class ClickHouseService:
                 )
                 for row in result.result_rows
             ]
+            metadata_cache.set(self._cache_key(), TABLES_KEY, tables)
+            return list(tables)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
     async def get_columns(self, table: str) -> List[ColumnInfo]:
+        return await run_blocking(self._get_columns, table)
+
+    def _get_columns(self, table: str) -> List[ColumnInfo]:
+        return self._get_columns_batch([table])[table]
+
+    def _get_columns_batch(self, tables: List[str]) -> Dict[str, List[ColumnInfo]]:
+        """Resolve the columns of several tables, fetching all cache misses in one query.
+
+        Names may be ``database.table`` or a bare table name, which matches that
+        table in any database.
+        """
         try:
-            if not self.client:
-                raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
-                
-            # Handle database.table format
-            if '.' in table:
-                database, table_name = table.split('.')
-                query = f"""
-                SELECT name, type, default_kind, default_expression
-                FROM system.columns
-                WHERE database = '{database}' AND table = '{table_name}'
-                ORDER BY position
-                """
-            else:
-                query = f"""
-                SELECT name, type, default_kind, default_expression
-                FROM system.columns
-                WHERE table = '{table}'
-                ORDER BY position
-                """
-            result = self.client.query(query)
-            return [
-                ColumnInfo(
-                    name=row[0],
-                    type=row[1],
-                    default_kind=row[2],
-                    default_expression=row[3]
-                )
-                for row in result.result_rows
-            ]
+            cache_key = self._cache_key()
+            columns = {}
+            missing = []
+            for table in tables:
+                cached = metadata_cache.get(cache_key, table)
+                if cached is not None:
+                    columns[table] = list(cached)
+                elif table not in missing:
+                    missing.append(table)
+
+            if missing:
+                parameters = {
+                    'qualified': [t for t in missing if '.' in t],
+                    'bare': [t for t in missing if '.' not in t]
+                }
+                conditions = []
+                if parameters['qualified']:
+                    conditions.append("has(%(qualified)s, concat(database, '.', table))")
+                if parameters['bare']:
+                    conditions.append("has(%(bare)s, table)")
+                with self._connection() as client:
+                    result = client.query(f"""
+                        SELECT database, table, name, type, default_kind, default_expression
+                        FROM system.columns
+                        WHERE {' OR '.join(conditions)}
+                        ORDER BY database, table, position
+                    """, parameters=parameters)
+
+                fetched = {table: [] for table in missing}
+                for row in result.result_rows:
+                    column = ColumnInfo(
+                        name=row[2],
+                        type=row[3],
+                        default_kind=row[4],
+                        default_expression=row[5]
+                    )
+                    for name in (f"{row[0]}.{row[1]}", row[1]):
+                        if name in fetched:
+                            fetched[name].append(column)
+                for table, table_columns in fetched.items():
+                    metadata_cache.set(cache_key, table, table_columns)
+                    columns[table] = list(table_columns)
+            return columns
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def export_data(self, table_name: str, columns: List[str], join_conditions: JoinConditions = None) -> ExportResponse:
-        try:
-            if not self.client:
-                raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
-                
-            if join_conditions:
-                # Handle multi-table JOIN
-                tables = join_conditions.tables
-                join_type = join_conditions.type
-                join_keys = join_conditions.keys
-                
-                if len(tables) < 2:
-                    raise HTTPException(status_code=400, detail="At least two tables required for JOIN")
-                
-                # Build JOIN query
-                select_columns = []
-                for table in tables:
-                    table_cols = await self.get_columns(table)
-                    for col in table_cols:
-                        if col.name in columns:
-                            select_columns.append(f"{table}.{col.name}")
-                
-                join_clauses = []
-                for i in range(1, len(tables)):
-                    prev_table = tables[i-1]
-                    curr_table = tables[i]
-                    join_key = join_keys.get(f"{prev_table}_{curr_table}")
-                    if not join_key:
-                        raise HTTPException(status_code=400, detail=f"Missing join key for {prev_table} and {curr_table}")
-                    join_clauses.append(f"{join_type} JOIN {curr_table} ON {prev_table}.{join_key} = {curr_table}.{join_key}")
-                
-                query = f"""
-                SELECT {', '.join(select_columns)}
-                FROM {tables[0]}
-                {' '.join(join_clauses)}
-                """
-            else:
-                # Single table query
-                query = f"SELECT {', '.join(columns)} FROM {table_name} LIMIT 100"
-            
-            # Execute query and get results
-            result = self.client.query(query)
-            
-            # Convert to list of dictionaries with IDs
-            records = []
-            for idx, row in enumerate(result.result_rows):
-                record = {'id': idx + 1}  # Add 1-based ID
-                for i, col in enumerate(columns):
-                    # Convert date to string if it's a date object
-                    value = row[i]
-                    if hasattr(value, 'strftime'):
-                        value = value.strftime('%Y-%m-%d')
-                    record[col] = value
-                records.append(record)
+    def _column_types(self, table_name: str) -> Dict[str, str]:
+        """Column name -> ClickHouse type of ``table_name``, from the cached ``system.columns`` lookup."""
+        return {column.name: column.type for column in self._get_columns(table_name)}
+
+    def _create_table_if_missing(self, client, table_name: str, file_path: str, columns: List[str]) -> bool:
+        """Create ``table_name`` from the design proposed for ``file_path``; return whether it was created."""
+        if client.command(f"EXISTS TABLE {quote_table(table_name)}"):
+            return False
+        client.command(design_table(table_name, file_path, columns).ddl)
+        # The table list changed, not just this table's metadata
+        self.invalidate_metadata()
+        return True
+
+    def invalidate_metadata(self, table: Optional[str] = None):
+        """Forget cached metadata for ``table`` (or the whole connection) after imports or DDL."""
+        metadata_cache.invalidate(self._cache_key(), table)
+
+    def _cache_key(self):
+        if self.current_config is not None:
+            return config_key(self.current_config)
+        return ('client', id(self.client))
+
+    def _build_export_query(
+        self,
+        table_name: str,
+        columns: List[str],
+        join_conditions: JoinConditions = None,
+        limit: Optional[int] = None
+    ) -> str:
+        if join_conditions:
+            # Handle multi-table JOIN
+            tables = join_conditions.tables
+            join_type = join_conditions.type
+            join_keys = join_conditions.keys
             
-            # Create upload directory if it doesn't exist
-            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+            if len(tables) < 2:
+                raise HTTPException(status_code=400, detail="At least two tables required for JOIN")
             
-            # Generate file path in upload directory
-            file_path = os.path.join(settings.UPLOAD_DIR, f"{table_name.replace('.', '_')}_export.csv")
+            # Build JOIN query, resolving every table's columns in one round trip
+            select_columns = []
+            table_columns = self._get_columns_batch(tables)
+            for table in tables:
+                for col in table_columns[table]:
+                    if col.name in columns:
+                        select_columns.append(f"{table}.{col.name}")
             
-            # Save records to CSV file
-            with open(file_path, 'w') as f:
-                # Write header
-                f.write(','.join(columns) + '\n')
-                # Write data
-                for record in records:
-                    row = [str(record.get(col, '')) for col in columns]
-                    f.write(','.join(row) + '\n')
+            join_clauses = []
+            for i in range(1, len(tables)):
+                prev_table = tables[i-1]
+                curr_table = tables[i]
+                join_key = join_keys.get(f"{prev_table}_{curr_table}")
+                if not join_key:
+                    raise HTTPException(status_code=400, detail=f"Missing join key for {prev_table} and {curr_table}")
+                join_clauses.append(f"{join_type} JOIN {curr_table} ON {prev_table}.{join_key} = {curr_table}.{join_key}")
             
+            query = f"""
+            SELECT {', '.join(select_columns)}
+            FROM {tables[0]}
+            {' '.join(join_clauses)}
+            """
+        else:
+            # Single table query
+            query = f"SELECT {', '.join(columns)} FROM {table_name}"
+
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return query
+
+    def _export_file_path(self, table_name: str, extension: str = '.csv', compression: Optional[str] = None) -> str:
+        # Create upload directory if it doesn't exist
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        if compression:
+            extension += COMPRESSION_EXTENSIONS[compression]
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{table_name.replace('.', '_')}_export{extension}")
+        # Names come from requests; an absolute path or separator must not escape UPLOAD_DIR
+        if os.path.dirname(os.path.realpath(file_path)) != os.path.realpath(settings.UPLOAD_DIR):
+            raise HTTPException(status_code=400, detail=f"Invalid export name '{table_name}'")
+        return file_path
+
+    @staticmethod
+    def _compression(compression: Optional[str]) -> Optional[str]:
+        try:
+            return validate_compression(compression)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @staticmethod
+    def _raw_format(fmt: str):
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported export format '{fmt}'. Expected one of: {', '.join(EXPORT_FORMATS)}"
+            )
+        return EXPORT_FORMATS[fmt]
+
+    def _iter_format_blocks(
+        self,
+        query: str,
+        fmt: str,
+        table_name: str,
+        stats: Dict[str, Any],
+        progress: Optional[JobProgress] = None,
+        compression: Optional[str] = None
+    ):
+        """Return ``(file_path, blocks)`` for a server-formatted or columnar export."""
+        extension = self._raw_format(fmt)[0]
+        if fmt in COLUMNAR_EXPORT_FORMATS:
+            if fmt == 'Arrow' and compression not in ARROW_CODECS:
+                raise HTTPException(status_code=400, detail="Arrow exports support zstd or lz4 compression")
+            # Compression is internal to the format, so the file name stays the same
+            file_path = self._export_file_path(table_name, extension)
+            return file_path, self._iter_columnar_blocks(query, fmt, file_path, stats, progress, compression)
+        file_path = self._export_file_path(table_name, extension, compression)
+        return file_path, self._iter_raw_blocks(query, fmt, file_path, stats, progress, compression)
+
+    def _iter_raw_blocks(
+        self,
+        query: str,
+        fmt: str,
+        file_path: str,
+        stats: Optional[Dict[str, Any]] = None,
+        progress: Optional[JobProgress] = None,
+        compression: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """Copy the server-formatted result bytes to ``file_path``, yielding each chunk.
+
+        No rows are decoded in Python. ``stats['record_count']`` counts output
+        lines minus the header, which is exact for TSVWithNames and JSONEachRow
+        and for CSV unless quoted fields contain newlines. With ``compression``
+        the file and the yielded chunks are compressed.
+        """
+        stats = stats if stats is not None else {}
+        header_lines = self._raw_format(fmt)[2]
+        compressor = Compressor(compression)
+        lines = 0
+        with StageTimer('export') as timer, open(file_path, 'wb') as f, self._connection() as client, \
+                closing(client.raw_stream(query, fmt=fmt)) as raw:
+            while True:
+                if progress:
+                    progress.check_cancelled()
+                with timer.stage('fetch'):
+                    data = raw.read(RAW_CHUNK_SIZE)
+                if not data:
+                    break
+                newlines = data.count(b'\n')
+                lines += newlines
+                with timer.stage('compress'):
+                    data = compressor.compress(data)
+                with timer.stage('write'):
+                    f.write(data)
+                timer.count(0, len(data))
+                if progress:
+                    progress.advance(newlines, len(data))
+                if data:
+                    yield data
+            with timer.stage('compress'):
+                tail = compressor.flush()
+            if tail:
+                with timer.stage('write'):
+                    f.write(tail)
+                timer.count(0, len(tail))
+                yield tail
+            stats['record_count'] = max(lines - header_lines, 0)
+            timer.count(stats['record_count'])
+
+    def _iter_columnar_blocks(
+        self,
+        query: str,
+        fmt: str,
+        file_path: str,
+        stats: Optional[Dict[str, Any]] = None,
+        progress: Optional[JobProgress] = None,
+        compression: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """Write Arrow result batches to a Parquet or Arrow file, yielding the bytes as they land.
+
+        Batches are written as they arrive without converting any values.
+        ``compression`` selects the format's internal codec. The yielded chunks
+        are read back from the growing file, so together they are exactly the
+        finished file, footer included.
+        """
+        stats = stats if stats is not None else {}
+        stats['record_count'] = 0
+        kind = COLUMNAR_EXPORT_FORMATS[fmt]
+        writer = None
+        reader = None
+        timer = StageTimer('export')
+        try:
+            with self._connection() as client, client.query_arrow_stream(query, use_strings=True) as stream:
+                for table in timer.iterate('fetch', stream):
+                    if progress:
+                        progress.check_cancelled()
+                    with timer.stage('write'):
+                        if writer is None:
+                            writer = ColumnarWriter(file_path, kind, table.schema, compression)
+                            reader = open(file_path, 'rb')
+                        writer.write(table)
+                    stats['record_count'] += table.num_rows
+                    if progress:
+                        progress.advance(table.num_rows, table.nbytes)
+                    data = reader.read()
+                    timer.count(table.num_rows, len(data))
+                    if data:
+                        yield data
+            with timer.stage('write'):
+                if writer is None:
+                    # Empty result: still produce a valid (schema-less) file
+                    writer = ColumnarWriter(file_path, kind, empty_schema(), compression)
+                    reader = open(file_path, 'rb')
+                writer.close()
+                writer = None
+            data = reader.read()
+            timer.count(0, len(data))
+            if data:
+                yield data
+        finally:
+            timer.record()
+            if writer is not None:
+                writer.close()
+            if reader is not None:
+                reader.close()
+
+    def _iter_csv_blocks(
+        self,
+        query: str,
+        columns: List[str],
+        file_path: str,
+        stats: Optional[Dict[str, Any]] = None,
+        preview_limit: int = 0,
+        progress: Optional[JobProgress] = None,
+        compression: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        append: bool = False
+    ) -> Iterator[bytes]:
+        """Read result blocks incrementally, write each to ``file_path`` and yield it as CSV bytes.
+
+        Only one block is held in memory at a time. Blocks arrive column
+        oriented, and each column goes through a converter picked once from
+        its ClickHouse type. If ``stats`` is given it is updated with the
+        running ``record_count``, the result's ``column_types`` and the first
+        ``preview_limit`` rows under ``preview``, as per-column lists of
+        JSON-ready values. With ``compression`` the file and the yielded bytes
+        are compressed. With ``append`` rows are added to an existing file (as
+        a new compressed member, if compressed) and the header is only written
+        when the file is new.
+        """
+        stats = stats if stats is not None else {}
+        stats.setdefault('record_count', 0)
+        preview = stats.setdefault('preview', [])
+        previewed = len(preview[0]) if preview else 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        compressor = Compressor(compression)
+        timer = StageTimer('export')
+
+        def flush() -> bytes:
+            with timer.stage('compress'):
+                data = compressor.compress(buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+            with timer.stage('write'):
+                f.write(data)
+            timer.count(0, len(data))
+            return data
+
+        has_header = append and os.path.exists(file_path) and os.path.getsize(file_path) > 0
+        with timer, open(file_path, 'ab' if append else 'wb') as f:
+            if not has_header:
+                writer.writerow(columns)
+                yield flush()
+            with self._connection() as client, \
+                    client.query_column_block_stream(query, parameters=parameters) as stream:
+                stats['column_types'] = result_types(stream)
+                to_csv = BlockConverter(stats['column_types'], 'csv')
+                to_json = BlockConverter(stats['column_types'], 'json')
+                if not preview:
+                    preview.extend([] for _ in stats['column_types'])
+                for block in timer.iterate('fetch', stream):
+                    if progress:
+                        progress.check_cancelled()
+                    rows = len(block[0]) if block else 0
+                    if previewed < preview_limit:
+                        head = to_json.convert([values[:preview_limit - previewed] for values in block])
+                        for values, converted in zip(preview, head):
+                            values.extend(converted)
+                        previewed = len(preview[0]) if preview else 0
+                    with timer.stage('convert'):
+                        block = to_csv.convert(block)
+                    with timer.stage('format'):
+                        writer.writerows(zip(*block))
+                    stats['record_count'] += rows
+                    timer.count(rows)
+                    data = flush()
+                    if progress:
+                        progress.advance(rows, len(data))
+                    if data:
+                        yield data
+            with timer.stage('compress'):
+                tail = compressor.flush()
+            if tail:
+                with timer.stage('write'):
+                    f.write(tail)
+                timer.count(0, len(tail))
+                yield tail
+
+    def write_query_to_csv(
+        self,
+        query: str,
+        columns: List[str],
+        file_path: str,
+        preview_limit: int = 0,
+        progress: Optional[JobProgress] = None,
+        compression: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        append: bool = False
+    ) -> Tuple[int, List[List[Any]]]:
+        """Write the result of ``query`` to ``file_path`` as CSV; return ``(records, preview)``.
+
+        Blocks the calling thread, so callers run it through ``run_blocking``.
+        The preview holds the first ``preview_limit`` rows as per-column lists
+        of JSON-ready values. See :meth:`_iter_csv_blocks` for the other options.
+        """
+        stats = {}
+        for _ in self._iter_csv_blocks(
+            query, columns, file_path, stats, preview_limit, progress, compression, parameters, append
+        ):
+            pass
+        return stats['record_count'], stats['preview']
+
+    def _sorting_key(self, table_name: str) -> str:
+        database, _, table = table_name.rpartition('.')
+        with self._connection() as client:
+            result = client.query(
+                f"""
+                SELECT sorting_key FROM system.tables
+                WHERE name = %(table)s AND database = {'%(database)s' if database else 'currentDatabase()'}
+                """,
+                parameters={'table': table, 'database': database}
+            )
+        return result.result_rows[0][0] if result.result_rows else ''
+
+    @staticmethod
+    def _split_key(expression: str) -> List[str]:
+        """Split a sorting key such as ``postcode1, toYYYYMM(date)`` on its top-level commas."""
+        parts, depth, current = [], 0, ''
+        for char in expression:
+            if char == ',' and depth == 0:
+                parts.append(current.strip())
+                current = ''
+                continue
+            depth += (char == '(') - (char == ')')
+            current += char
+        if current.strip():
+            parts.append(current.strip())
+        return parts
+
+    def _shard_conditions(
+        self,
+        table_name: str,
+        columns: List[str],
+        shards: int,
+        strategy: str,
+        key: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return one ``(WHERE condition, parameters)`` per shard; together they cover every row once."""
+        if strategy == 'hash':
+            key = key or self._sorting_key(table_name) or ', '.join(columns)
+            return [(f"cityHash64({key}) % {shards} = {i}", {}) for i in range(shards)]
+
+        if strategy == 'range':
+            key = key or next(iter(self._split_key(self._sorting_key(table_name))), None)
+            if not key:
+                raise HTTPException(status_code=400, detail="Range partitioning needs a partition_key or a table sorting key")
+            # Boundaries are quantiles of a reservoir sample of the key
+            with self._connection() as client:
+                result = client.query(
+                    f"SELECT arraySort(groupArraySample({int(settings.EXPORT_RANGE_SAMPLE_SIZE)})({key})) FROM {table_name}"
+                )
+            sample = [value for value in result.result_rows[0][0] if value is not None]
+            bounds = sorted({sample[len(sample) * i // shards] for i in range(1, shards)}) if sample else []
+            if not bounds:
+                return [("1", {})]
+            conditions = [(f"({key} < %(hi)s OR {key} IS NULL)", {'hi': bounds[0]})]
+            for low, high in zip(bounds, bounds[1:]):
+                conditions.append((f"{key} >= %(lo)s AND {key} < %(hi)s", {'lo': low, 'hi': high}))
+            conditions.append((f"{key} >= %(lo)s", {'lo': bounds[-1]}))
+            return conditions
+
+        if strategy == 'partition':
+            database, _, table = table_name.rpartition('.')
+            with self._connection() as client:
+                result = client.query(
+                    f"""
+                    SELECT partition_id, sum(rows) AS partition_rows FROM system.parts
+                    WHERE active AND table = %(table)s AND database = {'%(database)s' if database else 'currentDatabase()'}
+                    GROUP BY partition_id
+                    ORDER BY partition_rows DESC
+                    """,
+                    parameters={'table': table, 'database': database}
+                )
+            if not result.result_rows:
+                return [("1", {})]
+            # Largest partitions first, each to the currently lightest shard
+            bins = [[] for _ in range(min(shards, len(result.result_rows)))]
+            loads = [0] * len(bins)
+            for partition_id, rows in result.result_rows:
+                lightest = loads.index(min(loads))
+                bins[lightest].append(partition_id)
+                loads[lightest] += rows
+            return [("_partition_id IN %(ids)s", {'ids': tuple(ids)}) for ids in bins]
+
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported partition_by '{strategy}'. Expected one of: {', '.join(PARTITION_STRATEGIES)}"
+        )
+
+    def _export_shard(
+        self,
+        query: str,
+        parameters: Dict[str, Any],
+        columns: List[str],
+        file_path: str,
+        compression: Optional[str] = None,
+        progress: Optional[JobProgress] = None
+    ) -> Tuple[int, int]:
+        """Write one shard as a header plus server-formatted CSV rows; return ``(records, header bytes)``.
+
+        The header is written as its own compressed member (or frame), so the
+        shard bodies can later be concatenated behind a single header with a
+        plain byte copy. Records are counted as in :meth:`_iter_raw_blocks`.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerow(columns)
+        header_compressor = Compressor(compression)
+        header = header_compressor.compress(buffer.getvalue().encode('utf-8')) + header_compressor.flush()
+        compressor = Compressor(compression)
+        lines = 0
+        with StageTimer('export') as timer, open(file_path, 'wb') as f, self._connection() as client, \
+                closing(client.raw_stream(query, parameters=parameters, fmt='CSV')) as raw:
+            f.write(header)
+            while True:
+                if progress:
+                    progress.check_cancelled()
+                with timer.stage('fetch'):
+                    data = raw.read(RAW_CHUNK_SIZE)
+                if not data:
+                    break
+                newlines = data.count(b'\n')
+                lines += newlines
+                with timer.stage('compress'):
+                    data = compressor.compress(data)
+                with timer.stage('write'):
+                    f.write(data)
+                timer.count(newlines, len(data))
+                if progress:
+                    progress.advance(newlines, len(data))
+            with timer.stage('compress'):
+                tail = compressor.flush()
+            with timer.stage('write'):
+                f.write(tail)
+            timer.count(0, len(header) + len(tail))
+        return lines, len(header)
+
+    def _export_partitioned(
+        self,
+        table_name: str,
+        columns: List[str],
+        shards: int,
+        strategy: str = 'hash',
+        key: Optional[str] = None,
+        concat: bool = False,
+        compression: Optional[str] = None,
+        progress: Optional[JobProgress] = None
+    ) -> ExportResponse:
+        """Export a table as shards whose range queries run in parallel on separate pooled connections.
+
+        ClickHouse formats each shard's CSV, so Python only copies bytes and
+        the server spreads the work over its cores. With ``concat`` the shards
+        are joined into the regular export file and removed.
+        """
+        conditions = self._shard_conditions(table_name, columns, shards, strategy, key)
+        query = self._build_export_query(table_name, columns)
+        paths = [
+            self._export_file_path(f"{table_name}_part{i + 1:04d}", compression=compression)
+            for i in range(len(conditions))
+        ]
+        workers = max(1, min(settings.EXPORT_PARALLELISM, settings.CLICKHOUSE_POOL_SIZE, len(conditions)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export-shard") as pool:
+            futures = [
+                pool.submit(self._export_shard, f"{query} WHERE {condition}", parameters, columns, path, compression, progress)
+                for (condition, parameters), path in zip(conditions, paths)
+            ]
+            try:
+                results = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        record_count = sum(count for count, _ in results)
+
+        if concat:
+            file_path = self._export_file_path(table_name, compression=compression)
+            with open(file_path, 'wb') as out:
+                for i, (path, (_, header_size)) in enumerate(zip(paths, results)):
+                    with open(path, 'rb') as f:
+                        if i:
+                            f.seek(header_size)
+                        shutil.copyfileobj(f, out, RAW_CHUNK_SIZE)
+                    os.remove(path)
+            file_manifest.record(file_path, "export", record_count, columns=columns, source_table=table_name)
+            files = [file_path]
+        else:
+            for path, (count, _) in zip(paths, results):
+                file_manifest.record(path, "export", count, columns=columns, source_table=table_name)
+            files = paths
+
+        return ExportResponse(
+            message=f"Successfully exported {record_count} records in {len(paths)} shards",
+            record_count=record_count,
+            file_path=files[0],
+            records=[],
+            files=files
+        )
+
+    def _export_incremental(
+        self,
+        table_name: str,
+        columns: List[str],
+        watermark_column: str,
+        mode: str = 'delta',
+        destination: Optional[str] = None,
+        compression: Optional[str] = None,
+        progress: Optional[JobProgress] = None
+    ) -> ExportResponse:
+        """Export only rows whose ``watermark_column`` passed the last stored watermark.
+
+        The upper bound is fixed before reading, so rows arriving during the run
+        wait for the next one instead of being exported twice. ``delta`` writes
+        a new timestamped file per run; ``append`` adds the rows to one
+        growing ``<destination>_incremental_export.csv``. The watermark only advances after the file is complete.
+        Rows that arrive later with a watermark at or below the stored one are
+        not picked up, so an insertion timestamp makes a safer watermark than a
+        business date.
+        """
+        if mode not in INCREMENTAL_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported incremental_mode '{mode}'. Expected one of: {', '.join(INCREMENTAL_MODES)}"
+            )
+        if destination is not None and not DESTINATION_RE.match(destination):
+            raise HTTPException(
+                status_code=400,
+                detail="destination may only contain letters, digits and underscores"
+            )
+        destination = destination or table_name
+        last = watermark_store.get(table_name, destination, watermark_column)
+        with self._connection() as client:
+            result = client.query(
+                f"SELECT max({watermark_column}), count() FROM {table_name}"
+                + (f" WHERE {watermark_column} > %(last)s" if last is not None else ""),
+                parameters={'last': last}
+            )
+        upper, pending = result.result_rows[0]
+        if not pending:
             return ExportResponse(
-                message=f"Successfully exported {len(records)} records",
-                record_count=len(records),
+                message=f"No rows newer than {last}",
+                record_count=0,
+                file_path="",
+                records=[],
+                watermark=_json_value(last)
+            )
+
+        conditions = [f"{watermark_column} <= %(upper)s"]
+        if last is not None:
+            conditions.insert(0, f"{watermark_column} > %(last)s")
+        query = f"{self._build_export_query(table_name, columns)} WHERE {' AND '.join(conditions)}"
+        if mode == 'append':
+            # Named apart from the regular export file, which every /export overwrites
+            file_path = self._export_file_path(f"{destination}_incremental", compression=compression)
+        else:
+            file_path = self._export_file_path(f"{destination}_delta_{datetime.now().strftime('%Y%m%dT%H%M%S%f')}", compression=compression)
+        previous = file_manifest.find(file_path) if mode == 'append' else None
+
+        record_count, _ = self.write_query_to_csv(
+            query, columns, file_path, progress=progress, compression=compression,
+            parameters={'last': last, 'upper': upper}, append=mode == 'append'
+        )
+        total = record_count
+        if mode == 'append':
+            # Without a known previous count the manifest recounts the file
+            known = previous.get('record_count') if previous else None
+            total = record_count + known if known is not None else None
+        file_manifest.record(file_path, "export", total, columns=columns, source_table=table_name)
+        watermark_store.set(table_name, destination, watermark_column, upper, file_path=file_path, rows=record_count)
+
+        return ExportResponse(
+            message=f"Exported {record_count} new records up to {upper}",
+            record_count=record_count,
+            file_path=file_path,
+            records=[],
+            files=[file_path],
+            watermark=_json_value(upper)
+        )
+
+    async def export_data(
+        self,
+        table_name: str,
+        columns: List[str],
+        join_conditions: JoinConditions = None,
+        stream: bool = False,
+        limit: Optional[int] = 100,
+        fmt: Optional[str] = None,
+        compression: Optional[str] = None,
+        partitions: Optional[int] = None,
+        partition_by: str = 'hash',
+        partition_key: Optional[str] = None,
+        concat: bool = False,
+        watermark_column: Optional[str] = None,
+        incremental_mode: str = 'delta',
+        destination: Optional[str] = None,
+        shape: str = 'records'
+    ) -> ExportResponse:
+        return await run_blocking(
+            self._export_data, table_name, columns, join_conditions, stream, limit, fmt=fmt, compression=compression,
+            partitions=partitions, partition_by=partition_by, partition_key=partition_key, concat=concat,
+            watermark_column=watermark_column, incremental_mode=incremental_mode, destination=destination,
+            shape=shape
+        )
+
+    def _export_data(
+        self,
+        table_name: str,
+        columns: List[str],
+        join_conditions: JoinConditions = None,
+        stream: bool = False,
+        limit: Optional[int] = 100,
+        progress: Optional[JobProgress] = None,
+        fmt: Optional[str] = None,
+        compression: Optional[str] = None,
+        partitions: Optional[int] = None,
+        partition_by: str = 'hash',
+        partition_key: Optional[str] = None,
+        concat: bool = False,
+        watermark_column: Optional[str] = None,
+        incremental_mode: str = 'delta',
+        destination: Optional[str] = None,
+        shape: str = 'records'
+    ) -> ExportResponse:
+        """Export a table or join, returning up to ``limit`` preview rows laid out as ``shape``."""
+        try:
+            compression = self._compression(compression)
+            validate_shape(shape)
+            if watermark_column:
+                if join_conditions or fmt or (partitions and partitions > 1):
+                    raise HTTPException(status_code=400, detail="Incremental exports support single-table CSV only")
+                return self._export_incremental(
+                    table_name, columns, watermark_column, incremental_mode, destination, compression, progress
+                )
+            if partitions and partitions > 1:
+                if join_conditions or fmt:
+                    raise HTTPException(status_code=400, detail="Partitioned exports support single-table CSV only")
+                return self._export_partitioned(
+                    table_name, columns, partitions, partition_by, partition_key, concat, compression, progress
+                )
+
+            # In streaming mode the whole result goes to disk and only a preview is returned
+            query = self._build_export_query(
+                table_name, columns, join_conditions, limit=None if stream else limit
+            )
+
+            if fmt:
+                # Let ClickHouse format the output and copy the bytes as-is, or
+                # write its Arrow batches to a columnar file
+                stats = {}
+                file_path, blocks = self._iter_format_blocks(query, fmt, table_name, stats, progress, compression)
+                for _ in blocks:
+                    pass
+                file_manifest.record(
+                    file_path, "export", stats['record_count'], columns=columns, source_table=table_name
+                )
+                return ExportResponse(
+                    message=f"Successfully exported {stats['record_count']} records as {fmt}",
+                    record_count=stats['record_count'],
+                    file_path=file_path,
+                    records=[]
+                )
+
+            file_path = self._export_file_path(table_name, compression=compression)
+            record_count, preview = self.write_query_to_csv(
+                query, columns, file_path, preview_limit=limit or 0, progress=progress, compression=compression
+            )
+            file_manifest.record(file_path, "export", record_count, columns=columns, source_table=table_name)
+
+            # Preview values arrive already converted for JSON; records get 1-based IDs
+            preview = shape_columns(columns, preview or [[] for _ in columns], shape, first_id=1)
+
+            return ExportResponse(
+                message=f"Successfully exported {record_count} records",
+                record_count=record_count,
                 file_path=file_path,
-                records=records
+                records=preview.get('records', []),
+                columns=preview.get('columns'),
+                data=preview.get('data')
             )
+        except (HTTPException, JobCancelled):
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream_export(
+        self,
+        table_name: str,
+        columns: List[str],
+        join_conditions: JoinConditions = None,
+        fmt: Optional[str] = None,
+        compression: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """Return an iterator of CSV (or ``fmt``-formatted) chunks for a chunked HTTP response.
+
+        The same bytes, compressed if ``compression`` is set, are written to the
+        export file as they are produced. The iterator blocks, so it must be
+        consumed off the event loop (Starlette's StreamingResponse iterates sync
+        iterators in its threadpool).
+        """
+        if self.client is None and self.current_config is None:
+            raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
+        compression = self._compression(compression)
+        query = await run_blocking(self._build_export_query, table_name, columns, join_conditions)
+        stats = {}
+        if fmt:
+            file_path, blocks = self._iter_format_blocks(query, fmt, table_name, stats, compression=compression)
+        else:
+            file_path = self._export_file_path(table_name, compression=compression)
+            blocks = self._iter_csv_blocks(query, columns, file_path, stats, compression=compression)
+
+        def stream():
+            yield from blocks
+            # Only complete exports make it into the manifest
+            file_manifest.record(file_path, "export", stats['record_count'], columns=columns, source_table=table_name)
+        # Starlette consumes the body outside run_blocking, so it is profiled here
+        return profile_iterator(stream())
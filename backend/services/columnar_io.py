@@ -0,0 +1,237 @@
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from models.flatfile import ColumnInfo
+
+# Columnar formats: (file extension, media type)
+COLUMNAR_FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+PARQUET_MAGIC = b'PAR1'
+ARROW_MAGIC = b'ARROW1'
+# Export compression options map onto each format's internal codecs
+PARQUET_CODECS = {None: 'snappy', 'gzip': 'gzip', 'zstd': 'zstd', 'lz4': 'lz4'}
+ARROW_CODECS = {None: None, 'zstd': 'zstd', 'lz4': 'lz4_frame'}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet and Arrow files need the 'pyarrow' package")
+
+
+def detect_columnar(file_path: str) -> Optional[str]:
+    """Return 'parquet' or 'arrow' if the file starts with that format's magic bytes."""
+    with open(file_path, 'rb') as f:
+        return sniff_columnar(f.read(len(ARROW_MAGIC)))
+
+
+def sniff_columnar(head: bytes) -> Optional[str]:
+    if head.startswith(PARQUET_MAGIC):
+        return 'parquet'
+    if head.startswith(ARROW_MAGIC):
+        return 'arrow'
+    return None
+
+
+def empty_schema() -> "pa.Schema":
+    require_pyarrow()
+    return pa.schema([])
+
+
+def _arrow_reader(file_path: str):
+    return ipc.open_file(pa.memory_map(file_path, 'r'))
+
+
+def read_schema(file_path: str) -> "pa.Schema":
+    """Read the schema from the Parquet footer or the Arrow file header, not the data."""
+    require_pyarrow()
+    if detect_columnar(file_path) == 'parquet':
+        return pq.read_schema(file_path)
+    return _arrow_reader(file_path).schema
+
+
+def count_rows(file_path: str) -> int:
+    require_pyarrow()
+    if detect_columnar(file_path) == 'parquet':
+        return pq.ParquetFile(file_path).metadata.num_rows
+    reader = _arrow_reader(file_path)
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def null_counts(file_path: str) -> Dict[str, Optional[int]]:
+    """Nulls per column from Parquet row group statistics or Arrow batch headers; None where unknown."""
+    require_pyarrow()
+    if detect_columnar(file_path) == 'parquet':
+        metadata = pq.ParquetFile(file_path).metadata
+        counts: Dict[str, Optional[int]] = {}
+        for i in range(metadata.num_row_groups):
+            group = metadata.row_group(i)
+            for j in range(group.num_columns):
+                chunk = group.column(j)
+                name = chunk.path_in_schema
+                stats = chunk.statistics
+                if stats is None or not stats.has_null_count or counts.get(name, 0) is None:
+                    counts[name] = None
+                else:
+                    counts[name] = counts.get(name, 0) + stats.null_count
+        return counts
+    reader = _arrow_reader(file_path)
+    counts = {name: 0 for name in reader.schema.names}
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        for name, column in zip(batch.schema.names, batch.columns):
+            counts[name] += column.null_count
+    return counts
+
+
+def iter_tables(
+    file_path: str,
+    columns: Optional[List[str]] = None,
+    batch_rows: Optional[int] = None
+) -> Iterator["pa.Table"]:
+    """Yield the file as Arrow tables of at most ``batch_rows`` rows holding only ``columns``.
+
+    Parquet decodes just the requested column chunks. Arrow files are memory
+    mapped, so selecting columns costs no copy.
+    """
+    require_pyarrow()
+    if detect_columnar(file_path) == 'parquet':
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=batch_rows or 65536, columns=columns or None):
+            yield pa.Table.from_batches([batch])
+        return
+    reader = _arrow_reader(file_path)
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        table = pa.Table.from_batches([batch.select(columns) if columns else batch])
+        if batch_rows:
+            for start in range(0, table.num_rows, batch_rows):
+                yield table.slice(start, batch_rows)
+        else:
+            yield table
+
+
+def read_rows(file_path: str, offset: int, limit: int, columns: Optional[List[str]] = None) -> "pa.Table":
+    """Return rows ``[offset, offset + limit)``, skipping row groups (or batches) that fall outside them."""
+    require_pyarrow()
+    if detect_columnar(file_path) == 'parquet':
+        parquet_file = pq.ParquetFile(file_path)
+        metadata = parquet_file.metadata
+        groups = []
+        start = 0
+        first_start = None
+        for i in range(metadata.num_row_groups):
+            rows = metadata.row_group(i).num_rows
+            if start + rows > offset and start < offset + limit:
+                groups.append(i)
+                if first_start is None:
+                    first_start = start
+            start += rows
+        if not groups:
+            return read_schema(file_path).empty_table()
+        table = parquet_file.read_row_groups(groups, columns=columns or None)
+        return table.slice(offset - first_start, limit)
+
+    reader = _arrow_reader(file_path)
+    batches = []
+    start = 0
+    first_start = 0
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if start + batch.num_rows > offset and start < offset + limit:
+            batches.append(batch.select(columns) if columns else batch)
+            if len(batches) == 1:
+                first_start = start
+        start += batch.num_rows
+        if start >= offset + limit:
+            break
+    if not batches:
+        return reader.schema.empty_table()
+    return pa.Table.from_batches(batches).slice(offset - first_start, limit)
+
+
+def clickhouse_type(arrow_type: "pa.DataType") -> str:
+    """Map an Arrow type to the ClickHouse type it inserts into (without Nullable)."""
+    if pa.types.is_dictionary(arrow_type):
+        return clickhouse_type(arrow_type.value_type)
+    if pa.types.is_boolean(arrow_type):
+        return 'Bool'
+    if pa.types.is_integer(arrow_type):
+        prefix = 'Int' if pa.types.is_signed_integer(arrow_type) else 'UInt'
+        return f"{prefix}{arrow_type.bit_width}"
+    if pa.types.is_float32(arrow_type):
+        return 'Float32'
+    if pa.types.is_floating(arrow_type):
+        return 'Float64'
+    if pa.types.is_decimal(arrow_type):
+        return f"Decimal({arrow_type.precision}, {arrow_type.scale})"
+    if pa.types.is_date(arrow_type):
+        return 'Date32'
+    if pa.types.is_timestamp(arrow_type):
+        precision = {'s': 0, 'ms': 3, 'us': 6, 'ns': 9}[arrow_type.unit]
+        if arrow_type.tz:
+            return f"DateTime64({precision}, '{arrow_type.tz}')"
+        return f"DateTime64({precision})"
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return f"Array({clickhouse_type(arrow_type.value_type)})"
+    return 'String'
+
+
+def column_infos(file_path: str) -> List[ColumnInfo]:
+    """Describe a columnar file's columns from its schema and metadata, without reading data pages.
+
+    Writers mark most fields nullable whether or not they hold nulls, so a
+    column is only reported nullable when its null count is not known to be 0.
+    """
+    schema = read_schema(file_path)
+    nulls = null_counts(file_path)
+    columns = []
+    for field in schema:
+        low_cardinality = pa.types.is_dictionary(field.type)
+        ch_type = clickhouse_type(field.type)
+        nullable = field.nullable and nulls.get(field.name) != 0
+        if nullable:
+            ch_type = f"Nullable({ch_type})"
+        if low_cardinality:
+            ch_type = f"LowCardinality({ch_type})"
+        columns.append(ColumnInfo(
+            name=field.name,
+            type=ch_type,
+            nullable=nullable,
+            low_cardinality=low_cardinality
+        ))
+    return columns
+
+
+class ColumnarWriter:
+    """Write Arrow tables to a Parquet or Arrow IPC file as they arrive."""
+
+    def __init__(self, file_path: str, fmt: str, schema: "pa.Schema", compression: Optional[str] = None):
+        require_pyarrow()
+        if fmt == 'parquet':
+            self._writer = pq.ParquetWriter(file_path, schema, compression=PARQUET_CODECS[compression])
+        else:
+            if compression not in ARROW_CODECS:
+                raise ValueError(f"Arrow files support zstd or lz4 compression, not '{compression}'")
+            options = ipc.IpcWriteOptions(compression=ARROW_CODECS[compression])
+            self._writer = ipc.new_file(file_path, schema, options=options)
+
+    def write(self, table: "pa.Table"):
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
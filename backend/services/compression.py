@@ -0,0 +1,145 @@
+import gzip
+import io
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+# File extension appended to compressed exports
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+    'lz4': '.lz4',
+}
+# Leading bytes of each format, so inputs are recognised whatever their name
+MAGIC_BYTES = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+    b'\x04\x22\x4d\x18': 'lz4',
+}
+MEDIA_TYPES = {
+    'gzip': 'application/gzip',
+    'zstd': 'application/zstd',
+    'lz4': 'application/x-lz4',
+}
+
+
+def validate_compression(compression: Optional[str]) -> Optional[str]:
+    if compression and compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(
+            f"Unsupported compression '{compression}'. Expected one of: {', '.join(COMPRESSION_EXTENSIONS)}"
+        )
+    return compression or None
+
+
+def sniff_compression(head: bytes) -> Optional[str]:
+    """Return the compression format whose magic bytes start ``head``, if any."""
+    for magic, compression in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compression_from_extension(file_path: str) -> Optional[str]:
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if file_path.endswith(extension):
+            return compression
+    return None
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    with open(file_path, 'rb') as f:
+        return sniff_compression(f.read(4))
+
+
+def wrap_input(raw: BinaryIO, compression: str) -> BinaryIO:
+    """Wrap ``raw`` in a streaming decompressor. Closing the wrapper leaves ``raw`` open."""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if compression == 'zstd':
+        import zstandard
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+        return io.BufferedReader(reader)
+    if compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.LZ4FrameFile(raw, mode='rb')
+    raise ValueError(f"Unsupported compression '{compression}'")
+
+
+@contextmanager
+def open_input(file_path: str) -> Iterator[BinaryIO]:
+    """Open a file for binary reading, decompressing on the fly if it is compressed.
+
+    Nothing is decompressed to disk; readers see the plain bytes as a stream.
+    Plain files are returned as-is and stay seekable.
+    """
+    with open(file_path, 'rb') as raw:
+        compression = sniff_compression(raw.read(4))
+        raw.seek(0)
+        if compression is None:
+            yield raw
+            return
+        with wrap_input(raw, compression) as f:
+            yield f
+
+
+class Compressor:
+    """Incremental compressor; with no ``compression`` it passes bytes through."""
+
+    def __init__(self, compression: Optional[str] = None):
+        self.compression = validate_compression(compression)
+        self._started = False
+        if self.compression == 'gzip':
+            self._impl = zlib.compressobj(wbits=31)
+        elif self.compression == 'zstd':
+            import zstandard
+            self._impl = zstandard.ZstdCompressor().compressobj()
+        elif self.compression == 'lz4':
+            import lz4.frame
+            self._impl = lz4.frame.LZ4FrameCompressor()
+        else:
+            self._impl = None
+
+    def compress(self, data: bytes) -> bytes:
+        if self._impl is None:
+            return data
+        prefix = b''
+        if self.compression == 'lz4' and not self._started:
+            prefix = self._impl.begin()
+        self._started = True
+        return prefix + self._impl.compress(data)
+
+    def flush(self) -> bytes:
+        if self._impl is None:
+            return b''
+        if self.compression == 'lz4' and not self._started:
+            self._started = True
+            return self._impl.begin() + self._impl.flush()
+        return self._impl.flush()
+
+
+class Decompressor:
+    """Incremental decompressor that follows concatenated gzip members and zstd/lz4 frames."""
+
+    def __init__(self, compression: str):
+        self.compression = validate_compression(compression)
+        self._impl = self._new()
+
+    def _new(self):
+        if self.compression == 'gzip':
+            return zlib.decompressobj(wbits=31)
+        if self.compression == 'zstd':
+            import zstandard
+            return zstandard.ZstdDecompressor().decompressobj()
+        import lz4.frame
+        return lz4.frame.LZ4FrameDecompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        out = []
+        while data:
+            out.append(self._impl.decompress(data))
+            if not self._impl.eof:
+                break
+            # The next member or frame starts in whatever was left over
+            data = self._impl.unused_data
+            self._impl = self._new()
+        return b''.join(out)
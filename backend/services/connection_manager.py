@@ -0,0 +1,254 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from clickhouse_connect import get_client
+from fastapi import HTTPException
+
+from config.settings import settings
+from models.clickhouse import ClickHouseConfig
+from services.metrics import Gauge, registry
+
+SESSION_HEADER = "X-Session-Id"
+
+
+def config_key(config: ClickHouseConfig) -> Tuple:
+    """Hashable identity of a connection config, used to key pools and caches."""
+    return tuple(sorted(config.model_dump().items()))
+
+
+def create_client(config: ClickHouseConfig):
+    """Open a new, unpooled client for ``config``."""
+    return get_client(
+        host=config.host,
+        port=config.port,
+        username=config.user,
+        password=config.password,
+        database=config.database,
+        secure=config.secure,
+        verify=config.verify,
+        compress=settings.CLICKHOUSE_COMPRESSION or False
+    )
+
+
+class ConnectionPool:
+    """A bounded pool of ClickHouse clients sharing one connection config.
+
+    Each client is leased to a single caller at a time, so concurrent requests
+    never share a client session. Clients that sat idle for longer than
+    ``idle_check_seconds`` are pinged before being handed out again and
+    replaced if the ping fails.
+    """
+
+    def __init__(self, config: ClickHouseConfig, max_size: int, timeout: float, idle_check_seconds: float):
+        self.config = config
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_check_seconds = idle_check_seconds
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _create_client(self):
+        return create_client(self.config)
+
+    def _is_healthy(self, client, idle_since: float) -> bool:
+        if time.monotonic() - idle_since < self.idle_check_seconds:
+            return True
+        try:
+            return bool(client.ping())
+        except Exception:
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise Exception("Connection pool is closed")
+                if self._idle:
+                    client, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now and connect outside the lock
+                    self._size += 1
+                    client = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception("Timed out waiting for a ClickHouse connection")
+                self._cond.wait(remaining)
+
+        if client is not None:
+            if self._is_healthy(client, idle_since):
+                return client
+            # Replace the stale client, keeping its slot reserved
+            self._close_client(client)
+
+        try:
+            return self._create_client()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, client, broken: bool = False):
+        with self._cond:
+            if broken or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((client, time.monotonic()))
+            self._cond.notify()
+        if broken or self._closed:
+            self._close_client(client)
+
+    @staticmethod
+    def _close_client(client):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            idle = len(self._idle)
+            return {"size": self._size, "idle": idle, "in_use": self._size - idle, "max_size": self.max_size}
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for client, _ in idle:
+            self._close_client(client)
+
+
+class ConnectionManager:
+    """Registry of connection pools keyed by ClickHouseConfig.
+
+    Sessions (identified by the ``X-Session-Id`` request header) remember the
+    config they connected with; every operation then leases a client from the
+    pool shared by all sessions using that same config. ``/connect`` issues a
+    session id to clients that did not send one. Sessions idle for longer than
+    ``SESSION_IDLE_SECONDS``, or beyond the ``MAX_SESSIONS`` most recently
+    used, are forgotten.
+    """
+
+    def __init__(self):
+        self._pools: Dict[Tuple, ConnectionPool] = {}
+        # Session id -> (config, last used), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[ClickHouseConfig, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_pool(self, config: ClickHouseConfig) -> ConnectionPool:
+        key = config_key(config)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    config,
+                    max_size=settings.CLICKHOUSE_POOL_SIZE,
+                    timeout=settings.CLICKHOUSE_POOL_TIMEOUT,
+                    idle_check_seconds=settings.CLICKHOUSE_POOL_IDLE_CHECK_SECONDS
+                )
+                self._pools[key] = pool
+            return pool
+
+    @contextmanager
+    def connection(self, config: ClickHouseConfig) -> Iterator[Any]:
+        pool = self.get_pool(config)
+        client = pool.acquire()
+        broken = False
+        try:
+            yield client
+        except Exception:
+            # The client may be left mid-stream; don't hand it out again
+            broken = True
+            raise
+        finally:
+            pool.release(client, broken=broken)
+
+    def set_session_config(self, session_id: Optional[str], config: ClickHouseConfig) -> str:
+        """Bind ``config`` to ``session_id``, or to a new session if none was given; return the id."""
+        session_id = session_id or uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (config, now)
+            self._sessions.move_to_end(session_id)
+            self._expire_sessions(now)
+        return session_id
+
+    def get_session_config(self, session_id: Optional[str]) -> Optional[ClickHouseConfig]:
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._expire_sessions(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def _expire_sessions(self, now: float):
+        # Oldest first, so expiry stops at the first session still in use
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= settings.SESSION_IDLE_SECONDS and len(self._sessions) <= settings.MAX_SESSIONS:
+                break
+            del self._sessions[session_id]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            pools = list(self._pools.values())
+        return {f"{p.config.user}@{p.config.host}:{p.config.port}/{p.config.database}": p.stats() for p in pools}
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+
+connection_manager = ConnectionManager()
+
+
+def _pool_connections():
+    for pool, stats in connection_manager.stats().items():
+        for state in ("idle", "in_use"):
+            yield {"pool": pool, "state": state}, stats[state]
+
+
+def _pool_limits():
+    return [({"pool": pool}, stats["max_size"]) for pool, stats in connection_manager.stats().items()]
+
+
+registry.register(Gauge(
+    "clickhouse_pool_connections", "Open pooled ClickHouse connections by state", ("pool", "state"),
+    callback=_pool_connections
+))
+registry.register(Gauge(
+    "clickhouse_pool_max_connections", "Connection limit of each ClickHouse pool", ("pool",),
+    callback=_pool_limits
+))
+
+
+@contextmanager
+def leased_client(client=None, config: Optional[ClickHouseConfig] = None) -> Iterator[Any]:
+    """Yield ``client`` if one was given, otherwise lease one for ``config`` from the pool."""
+    if client is not None:
+        yield client
+    elif config is not None:
+        with connection_manager.connection(config) as leased:
+            yield leased
+    else:
+        raise HTTPException(status_code=400, detail="Not connected to ClickHouse")
@@ -0,0 +1,48 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from config.settings import settings
+from services.metrics import Gauge, registry
+from services.profiling import current_capture
+
+T = TypeVar("T")
+
+# Shared, bounded pool for blocking ClickHouse, pandas and file I/O work so
+# that none of it runs on the event loop
+_executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_WORKERS,
+    thread_name_prefix="blocking-io"
+)
+_tasks = registry.register(Gauge("blocking_tasks", "Tasks in the blocking-work pool by state", ("state",)))
+
+
+def _tracked(call: Callable[[], T]) -> T:
+    _tasks.dec(state="queued")
+    _tasks.inc(state="running")
+    try:
+        return call()
+    finally:
+        _tasks.dec(state="running")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``func`` in the blocking-work pool and await its result.
+
+    The caller's context variables are carried over to the worker thread.
+    When the request is being profiled, the call runs under its capture.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    capture = current_capture.get()
+    if capture is not None:
+        call = functools.partial(capture.run, call)
+    _tasks.inc(state="queued")
+    return await loop.run_in_executor(_executor, _tracked, call)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from services.columnar_io import COLUMNAR_FORMATS, count_rows as count_columnar_rows, detect_columnar
+from services.compression import COMPRESSION_EXTENSIONS
+from services.flatfile_io import count_rows
+
+MANIFEST_NAME = ".manifest.json"
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+EXPORT_SUFFIXES = (
+    ('_export.csv',)
+    + tuple(f'_export.csv{ext}' for ext in COMPRESSION_EXTENSIONS.values())
+    + tuple(f'_export{ext}' for ext, _ in COLUMNAR_FORMATS.values())
+)
+
+
+def is_export_file(filename: str) -> bool:
+    return filename.endswith(EXPORT_SUFFIXES)
+
+
+def count_records(file_path: str) -> int:
+    if detect_columnar(file_path):
+        return count_columnar_rows(file_path)
+    return count_rows(file_path)[0]
+
+
+def file_sha256(file_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 of a file's bytes, reused from the manifest while size and mtime are unchanged."""
+    stat = os.stat(file_path)
+    entry = file_manifest.find(file_path)
+    if entry and entry.get("sha256") and entry["size_bytes"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry["sha256"]
+
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        digest = _hash_memo.get(memo_key)
+    if digest is None:
+        digest = file_sha256(file_path)
+        with _hash_lock:
+            if len(_hash_memo) >= 1024:
+                _hash_memo.clear()
+            _hash_memo[memo_key] = digest
+        if entry is not None:
+            file_manifest.update(file_path, sha256=digest)
+    return digest
+
+
+class FileManifest:
+    """Persistent index of the files in the upload directory.
+
+    Each file gets a stable integer id plus its row count, size, mtime,
+    column names and source table, stored in ``.manifest.json`` next to the
+    files. Exports, uploads and imports update entries as they happen; listing
+    only re-stats known files and rescans the directory when its mtime moves,
+    so no file is re-read unless it changed on disk.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._loaded_from: Optional[str] = None
+        # mtime the directory had right after our own last manifest write
+        self._own_dir_mtime: Optional[float] = None
+
+    @property
+    def directory(self) -> str:
+        return self._directory or settings.UPLOAD_DIR
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None or self._loaded_from != self.path:
+            self._loaded_from = self.path
+            self._own_dir_mtime = None
+            try:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {"next_id": 1, "dir_mtime": None, "files": {}}
+        return self._data
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+        self._own_dir_mtime = os.stat(self.directory).st_mtime
+
+    def _upsert(self, data: Dict[str, Any], filename: str, kind: str, stat: os.stat_result, **fields) -> Dict[str, Any]:
+        entry = data["files"].get(filename)
+        if entry is None:
+            entry = {"id": data["next_id"], "name": filename, "kind": kind, "columns": [], "source_table": None}
+            data["next_id"] += 1
+            data["files"][filename] = entry
+        entry.update({
+            "path": os.path.join(self.directory, filename),
+            "size_bytes": stat.st_size,
+            "mtime": stat.st_mtime,
+        })
+        entry.update({key: value for key, value in fields.items() if value is not None})
+        if fields.get("record_count") is None and "record_count" not in entry:
+            entry["record_count"] = count_records(entry["path"])
+        return entry
+
+    def record(
+        self,
+        file_path: str,
+        kind: str,
+        record_count: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        source_table: Optional[str] = None,
+        **extra: Any
+    ) -> Optional[Dict[str, Any]]:
+        """Add or refresh the entry for ``file_path`` after it was written."""
+        if os.path.dirname(os.path.abspath(file_path)) != os.path.abspath(self.directory):
+            return None
+        filename = os.path.basename(file_path)
+        with self._lock:
+            data = self._load()
+            stat = os.stat(file_path)
+            entry = data["files"].get(filename)
+            if entry is not None and record_count is None:
+                # Content changed, so a cached count is stale
+                entry.pop("record_count", None)
+            entry = self._upsert(
+                data, filename, kind, stat,
+                record_count=record_count, columns=columns, source_table=source_table, **extra
+            )
+            self._save()
+            return dict(entry)
+
+    def record_import(self, file_path: str, table_name: str):
+        """Note that ``file_path`` was imported into ``table_name``."""
+        if os.path.dirname(os.path.abspath(file_path)) != os.path.abspath(self.directory):
+            return
+        filename = os.path.basename(file_path)
+        with self._lock:
+            data = self._load()
+            entry = data["files"].get(filename)
+            if entry is None:
+                entry = self._upsert(data, filename, "export" if is_export_file(filename) else "upload", os.stat(file_path))
+            imported_to = entry.setdefault("imported_to", [])
+            if table_name not in imported_to:
+                imported_to.append(table_name)
+            self._save()
+
+    def _revalidate(self, data: Dict[str, Any]) -> bool:
+        changed = False
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime
+        except FileNotFoundError:
+            return False
+
+        if dir_mtime not in (data.get("dir_mtime"), self._own_dir_mtime):
+            # Files were added or removed: pick up unknown ones, drop missing ones
+            present = set(os.listdir(self.directory))
+            for filename in list(data["files"]):
+                if filename not in present:
+                    del data["files"][filename]
+            for filename in present:
+                if filename not in data["files"] and is_export_file(filename):
+                    self._upsert(data, filename, "export", os.stat(os.path.join(self.directory, filename)))
+            data["dir_mtime"] = dir_mtime
+            changed = True
+
+        for filename, entry in list(data["files"].items()):
+            try:
+                stat = os.stat(entry["path"])
+            except FileNotFoundError:
+                del data["files"][filename]
+                changed = True
+                continue
+            if stat.st_mtime != entry["mtime"] or stat.st_size != entry["size_bytes"]:
+                entry.pop("record_count", None)
+                self._upsert(data, filename, entry["kind"], stat)
+                changed = True
+        return changed
+
+    def list(self, kind: Optional[str] = "export") -> List[Dict[str, Any]]:
+        """Return entries newest first, revalidated against the directory."""
+        with self._lock:
+            data = self._load()
+            if self._revalidate(data):
+                self._save()
+            entries = [dict(e) for e in data["files"].values() if kind is None or e["kind"] == kind]
+        return sorted(entries, key=lambda e: e["mtime"], reverse=True)
+
+    def find(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for ``file_path`` if it lives in the upload directory."""
+        if os.path.dirname(os.path.abspath(file_path)) != os.path.abspath(self.directory):
+            return None
+        with self._lock:
+            entry = self._load()["files"].get(os.path.basename(file_path))
+            return dict(entry) if entry else None
+
+    def update(self, file_path: str, **fields: Any):
+        """Attach extra fields (e.g. a content hash) to an existing entry."""
+        with self._lock:
+            entry = self._load()["files"].get(os.path.basename(file_path))
+            if entry is not None:
+                entry.update(fields)
+                self._save()
+
+    def get(self, file_id: int) -> Optional[Dict[str, Any]]:
+        for entry in self.list(kind=None):
+            if entry["id"] == file_id:
+                return entry
+        return None
+
+
+file_manifest = FileManifest()
+_hash_memo: Dict[tuple, str] = {}
+_hash_lock = threading.Lock()
@@ -0,0 +1,283 @@
+import io
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from config.settings import settings
+from services.compression import open_input, sniff_compression, wrap_input
+from services.value_conversion import base_type
+
+COUNT_BLOCK_SIZE = 1024 * 1024
+ESTIMATE_SAMPLES = 16
+ESTIMATE_SAMPLE_SIZE = 64 * 1024
+# Target types whose values are read as text; Date covers Date32, DateTime and DateTime64
+TEXT_TYPE_PREFIXES = ('String', 'FixedString', 'Enum', 'UUID', 'IPv4', 'IPv6', 'Date')
+
+
+def parse_header(line: bytes, delimiter: str = ',') -> List[str]:
+    """Return the column names in a CSV header line."""
+    return list(pd.read_csv(io.BytesIO(line), sep=delimiter, nrows=0).columns)
+
+
+def read_header(file_path: str, delimiter: str = ',') -> List[str]:
+    """Return the column names from the first line of a (possibly compressed) CSV file."""
+    with open_input(file_path) as f:
+        first_line = f.readline()
+    return parse_header(first_line, delimiter)
+
+
+def count_rows(file_path: str, estimate: bool = False) -> Tuple[int, bool]:
+    """Count data rows (excluding the header) without parsing the file.
+
+    Returns ``(rows, exact)``. The exact count is a buffered newline scan, so a
+    quoted field containing a newline counts as an extra row. With
+    ``estimate=True`` files larger than the sample budget are not read in full:
+    the average line length is taken from evenly spaced samples and the count
+    extrapolated from the file size.
+
+    Compressed files are decompressed as a stream. Their estimate reads only
+    the start of the file and scales its line count by the share of
+    compressed bytes consumed.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return 0, True
+
+    with open(file_path, 'rb') as raw:
+        compression = sniff_compression(raw.read(4))
+        raw.seek(0)
+        if compression:
+            return _count_compressed_rows(raw, compression, size, estimate)
+
+    with open(file_path, 'rb') as f:
+        header_size = len(f.readline())
+        if estimate and size > ESTIMATE_SAMPLES * ESTIMATE_SAMPLE_SIZE * 2:
+            body = size - header_size
+            step = body // ESTIMATE_SAMPLES
+            sampled_bytes = 0
+            sampled_lines = 0
+            for i in range(ESTIMATE_SAMPLES):
+                f.seek(header_size + i * step)
+                sample = f.read(ESTIMATE_SAMPLE_SIZE)
+                sampled_bytes += len(sample)
+                sampled_lines += sample.count(b'\n')
+            if sampled_lines:
+                return int(round(body * sampled_lines / sampled_bytes)), False
+
+        f.seek(0)
+        lines = 0
+        last = b''
+        for block in iter(lambda: f.read(COUNT_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+            last = block
+    # A final line without a trailing newline is still a row
+    if not last.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0), True
+
+
+def _count_compressed_rows(raw, compression: str, size: int, estimate: bool) -> Tuple[int, bool]:
+    budget = ESTIMATE_SAMPLES * ESTIMATE_SAMPLE_SIZE
+    lines = 0
+    read = 0
+    last = b''
+    with wrap_input(raw, compression) as f:
+        for block in iter(lambda: f.read(COUNT_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+            read += len(block)
+            last = block
+            if estimate and read >= budget and raw.tell() < size:
+                # The header line is included in the sample; it is negligible
+                return int(round(lines * size / raw.tell())), False
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0), True
+
+
+def chunk_sizes(chunk_rows: Optional[int] = None, chunk_bytes: Optional[int] = None) -> Tuple[int, Optional[int]]:
+    """Resolve ``(chunk_rows, chunk_bytes)`` for an import.
+
+    ``IMPORT_CHUNK_BYTES`` only applies when the caller chose neither size, so
+    an explicit ``chunk_rows`` (or a checkpoint's row chunking) is kept.
+    """
+    if chunk_rows is None and chunk_bytes is None:
+        chunk_bytes = settings.IMPORT_CHUNK_BYTES
+    return chunk_rows or settings.IMPORT_CHUNK_ROWS, chunk_bytes
+
+
+def csv_dtypes(column_types: Optional[Dict[str, str]]) -> Optional[Dict[str, type]]:
+    """Pandas dtypes for CSV chunks inserted into columns of the given ClickHouse types.
+
+    Each chunk is parsed on its own, so without them pandas guesses every
+    column per chunk: a column holding only digits in one chunk comes back
+    as int64 and is rejected by a String target.
+    """
+    if not column_types:
+        return None
+    return {
+        name: str for name, ch_type in column_types.items()
+        if base_type(ch_type).startswith(TEXT_TYPE_PREFIXES)
+    } or None
+
+
+def temporal_columns(column_types: Optional[Dict[str, str]]) -> List[str]:
+    """Names of the Date, Date32, DateTime and DateTime64 columns among ``column_types``."""
+    if not column_types:
+        return []
+    return [name for name, ch_type in column_types.items() if base_type(ch_type).startswith('Date')]
+
+
+def parse_temporal(chunk: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Parse the ISO date and time text of ``columns`` in ``chunk`` into datetime64.
+
+    insert_df rejects str values for Date and DateTime columns; empty fields
+    become NaT, which Nullable columns store as NULL.
+    """
+    for name in columns:
+        if name in chunk.columns:
+            chunk[name] = pd.to_datetime(chunk[name], format='ISO8601')
+    return chunk
+
+
+def _record_boundary(block: bytes) -> int:
+    """Return the end offset of the last complete CSV record in ``block``.
+
+    A newline only terminates a record when it is not inside a quoted field,
+    i.e. when the number of quote characters before it is even. Returns -1 if
+    the block does not contain a complete record.
+    """
+    end = block.rfind(b'\n')
+    while end != -1:
+        if block.count(b'"', 0, end) % 2 == 0:
+            return end + 1
+        end = block.rfind(b'\n', 0, end)
+    return -1
+
+
+def _read_full(f, size: int) -> bytes:
+    # Streaming decompressors may return short reads before EOF
+    data = f.read(size)
+    while data and len(data) < size:
+        more = f.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def skip_to(f, offset: int, position: int = 0):
+    """Advance ``f`` from ``position`` to ``offset``, seeking when possible and reading otherwise."""
+    if f.seekable():
+        f.seek(offset)
+        return
+    remaining = offset - position
+    while remaining > 0:
+        data = f.read(min(remaining, COUNT_BLOCK_SIZE))
+        if not data:
+            break
+        remaining -= len(data)
+
+
+def iter_record_blocks(f, chunk_bytes: int) -> Iterator[bytes]:
+    """Yield blocks of roughly ``chunk_bytes`` that end on a record boundary.
+
+    Each block is cut from a window of ``chunk_bytes`` that starts where the
+    previous block ended, so the blocks only depend on that start offset and
+    reading again from any block boundary reproduces them.
+    """
+    pending = b''
+    while True:
+        # Top the carried-over bytes up to a full window, or grow the window
+        # by another chunk while a single record does not fit
+        data = _read_full(f, chunk_bytes - len(pending) if len(pending) < chunk_bytes else chunk_bytes)
+        if not data:
+            break
+        pending += data
+        boundary = _record_boundary(pending)
+        if boundary == -1:
+            # A single record is larger than the chunk size; keep reading.
+            continue
+        yield pending[:boundary]
+        pending = pending[boundary:]
+    if pending.strip():
+        yield pending
+
+
+def iter_csv_chunks(
+    file_path: str,
+    columns: Optional[List[str]] = None,
+    chunk_rows: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+    delimiter: str = ',',
+    dtype: Optional[Dict[str, type]] = None
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV file as a sequence of DataFrames with bounded size.
+
+    When ``chunk_bytes`` is given the file is split on record boundaries into
+    blocks of about that many bytes, otherwise pandas reads ``chunk_rows`` rows
+    at a time. Only one chunk is held in memory at any point. ``dtype`` is
+    applied to every chunk alike (see :func:`csv_dtypes`).
+    """
+    for chunk, _ in iter_csv_chunks_with_offsets(file_path, columns, chunk_rows, chunk_bytes, delimiter, dtype=dtype):
+        yield chunk
+
+
+def iter_csv_chunks_with_offsets(
+    file_path: str,
+    columns: Optional[List[str]] = None,
+    chunk_rows: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+    delimiter: str = ',',
+    start_offset: int = 0,
+    start_row: int = 0,
+    dtype: Optional[Dict[str, type]] = None
+) -> Iterator[Tuple[pd.DataFrame, int]]:
+    """Like :func:`iter_csv_chunks`, also yielding the file offset reached after each chunk.
+
+    Offsets are exact for byte-sized chunks; for row-sized chunks they follow
+    pandas' read-ahead buffer and are only suitable for progress reporting.
+    Compressed files are decompressed as a stream and offsets then count
+    decompressed bytes.
+
+    To resume, byte-sized chunks start at ``start_offset`` (an offset yielded
+    earlier) and row-sized chunks skip the first ``start_row`` data rows.
+    """
+    usecols = columns or None
+    chunk_rows, chunk_bytes = chunk_sizes(chunk_rows, chunk_bytes)
+
+    if not chunk_bytes:
+        with open_input(file_path) as f:
+            reader = pd.read_csv(
+                f,
+                sep=delimiter,
+                usecols=usecols,
+                dtype=dtype,
+                chunksize=chunk_rows,
+                # A callable keeps memory flat; pandas turns a range of row
+                # numbers into a set as large as the rows already committed
+                skiprows=(lambda i: 0 < i <= start_row) if start_row else None
+            )
+            with reader:
+                for chunk in reader:
+                    yield (chunk[columns] if columns else chunk), f.tell()
+        return
+
+    with open_input(file_path) as f:
+        header_line = f.readline()
+        header = parse_header(header_line, delimiter)
+        offset = len(header_line)
+        if start_offset > offset:
+            skip_to(f, start_offset, offset)
+            offset = start_offset
+        for block in iter_record_blocks(f, chunk_bytes):
+            offset += len(block)
+            chunk = pd.read_csv(
+                io.BytesIO(block),
+                sep=delimiter,
+                header=None,
+                names=header,
+                usecols=usecols,
+                dtype=dtype
+            )
+            yield (chunk[columns] if columns else chunk), offset
@@ -1,115 +1,236 @@
+import hashlib
+import tempfile
 import pandas as pd
 from fastapi import UploadFile, HTTPException
 import os
-from typing import List, Dict, Any
-from models.flatfile import FileInfo, ColumnInfo, PreviewData
+from typing import List, Dict, Any, Optional
+from models.flatfile import FileInfo, ColumnInfo, PreviewData, TableDesign
 from config.settings import settings
-from clickhouse_connect import get_client
-from models.clickhouse import ClickHouseConfig, TableInfo, ColumnInfo, JoinConditions, ExportResponse
+from models.clickhouse import ClickHouseConfig
+from services.clickhouse_service import ClickHouseService
+from services.connection_manager import leased_client
+from services.columnar_io import column_infos, count_rows as count_columnar_rows, detect_columnar, read_rows, read_schema, sniff_columnar
+from services.compression import Decompressor, compression_from_extension, open_input, sniff_compression
+from services.executor import run_blocking
+from services.file_index import file_manifest
+from services.flatfile_io import count_rows, parse_header
+from services.metrics import StageTimer
+from services.table_design import design_table
+from services.type_inference import infer_schema
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 class FlatFileService:
-    def __init__(self, client):
+    def __init__(self, client=None, config: Optional[ClickHouseConfig] = None):
         self.client = client
+        self.current_config = config
         self.upload_dir = settings.UPLOAD_DIR
         os.makedirs(self.upload_dir, exist_ok=True)
 
+    def _connection(self):
+        return leased_client(self.client, self.current_config)
+
     async def save_file(self, file: UploadFile) -> FileInfo:
         try:
-            # Create file path
-            file_path = os.path.join(self.upload_dir, file.filename)
-            
-            # Save file
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-            
-            # Read file info
-            df = pd.read_csv(file_path)
-            
+            if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail=f"File exceeds the {settings.MAX_FILE_SIZE} byte limit")
+            return await run_blocking(self._save_file, file.filename, file.file)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to save file: {str(e)}")
+
+    def _save_file(self, filename: str, source) -> FileInfo:
+        """Copy an upload to disk in one pass, hashing and counting lines as it goes.
+
+        The data lands in a temp file in the upload directory and is renamed
+        into place only once complete, so readers never see a partial file.
+        Compressed uploads are stored as they arrive; lines and the header are
+        taken from a streaming decompression of each chunk. Parquet and Arrow
+        files are described from their own metadata instead.
+        """
+        filename = os.path.basename(filename)
+        file_path = os.path.join(self.upload_dir, filename)
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, prefix=".upload-")
+        timer = StageTimer("upload")
+        try:
+            sha = hashlib.sha256()
+            size = 0
+            lines = 0
+            header = b''
+            last = b''
+            decompressor = None
+            columnar = None
+            with os.fdopen(fd, "wb") as f:
+                for chunk in timer.iterate("receive", iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b'')):
+                    size += len(chunk)
+                    if size > settings.MAX_FILE_SIZE:
+                        raise HTTPException(status_code=413, detail=f"File exceeds the {settings.MAX_FILE_SIZE} byte limit")
+                    with timer.stage("hash"):
+                        sha.update(chunk)
+                    with timer.stage("write"):
+                        f.write(chunk)
+                    if size == len(chunk):
+                        columnar = sniff_columnar(chunk)
+                        compression = sniff_compression(chunk)
+                        decompressor = Decompressor(compression) if compression else None
+                    if columnar:
+                        continue
+                    with timer.stage("inspect"):
+                        text = decompressor.decompress(chunk) if decompressor else chunk
+                        if not text:
+                            continue
+                        if not header.endswith(b'\n'):
+                            header += text[:text.find(b'\n') + 1 or len(text)]
+                        lines += text.count(b'\n')
+                    last = text
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            timer.record()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        try:
+            if columnar:
+                with timer.stage("inspect"):
+                    row_count = count_columnar_rows(file_path)
+                    columns = read_schema(file_path).names
+            else:
+                # A final line without a trailing newline is still a row
+                if last and not last.endswith(b'\n'):
+                    lines += 1
+                row_count = max(lines - 1, 0)
+                columns = parse_header(header) if header.strip() else []
+            digest = sha.hexdigest()
+            file_manifest.record(file_path, "upload", row_count, columns=columns, sha256=digest)
+            timer.count(row_count, size)
+
             return FileInfo(
-                filename=file.filename,
+                filename=filename,
                 file_path=file_path,
-                row_count=len(df),
-                column_count=len(df.columns)
+                row_count=row_count,
+                column_count=len(columns),
+                size_bytes=size,
+                sha256=digest
             )
         except Exception as e:
             raise Exception(f"Failed to save file: {str(e)}")
+        finally:
+            timer.record()
 
     async def get_file_columns(self, filename: str) -> List[ColumnInfo]:
+        return await run_blocking(self._get_file_columns, filename)
+
+    def _get_file_columns(self, filename: str) -> List[ColumnInfo]:
         try:
             file_path = os.path.join(self.upload_dir, filename)
-            df = pd.read_csv(file_path)
-            
-            return [
-                ColumnInfo(
-                    name=col,
-                    type=str(df[col].dtype)
-                )
-                for col in df.columns
-            ]
+            if detect_columnar(file_path):
+                # Typed already: read from the schema, no data pages touched
+                return column_infos(file_path)
+            # Inferred from a bounded sample and cached by content hash
+            return infer_schema(file_path)
         except Exception as e:
             raise Exception(f"Failed to get file columns: {str(e)}")
 
-    async def preview_file(self, filename: str, limit: int = 100) -> PreviewData:
+    async def get_table_design(self, filename: str, table_name: str, columns: Optional[List[str]] = None) -> TableDesign:
+        return await run_blocking(self._get_table_design, filename, table_name, columns)
+
+    def _get_table_design(self, filename: str, table_name: str, columns: Optional[List[str]] = None) -> TableDesign:
+        try:
+            return design_table(table_name, os.path.join(self.upload_dir, filename), columns)
+        except Exception as e:
+            raise Exception(f"Failed to design table: {str(e)}")
+
+    async def preview_file(self, filename: str, limit: int = 100, estimate: bool = False) -> PreviewData:
+        return await run_blocking(self._preview_file, filename, limit, estimate)
+
+    def _preview_file(self, filename: str, limit: int = 100, estimate: bool = False) -> PreviewData:
         try:
             file_path = os.path.join(self.upload_dir, filename)
-            df = pd.read_csv(file_path)
-            
-            # Get total rows
-            total_rows = len(df)
+            if detect_columnar(file_path):
+                # Only the row groups covering the first `limit` rows are read
+                table = read_rows(file_path, 0, limit)
+                return PreviewData(
+                    data=table.to_pylist(),
+                    columns=table.column_names,
+                    total_rows=count_columnar_rows(file_path)
+                )
+
+            # Parse only the rows being previewed, decompressing just that far
+            with open_input(file_path) as f:
+                preview_df = pd.read_csv(f, nrows=limit)
+            preview_df = preview_df.astype(object).where(preview_df.notna(), None)
             
-            # Get preview data
-            preview_df = df.head(limit)
+            # Get total rows from a newline scan (or a sampled estimate)
+            total_rows, exact = count_rows(file_path, estimate=estimate)
             
             return PreviewData(
                 data=preview_df.to_dict(orient='records'),
-                columns=list(df.columns),
-                total_rows=total_rows
+                columns=list(preview_df.columns),
+                total_rows=total_rows,
+                total_rows_estimated=not exact
             )
         except Exception as e:
             raise Exception(f"Failed to preview file: {str(e)}")
 
-    async def import_from_flatfile(self, table_name: str, file_path: str, columns: List[str]) -> Dict[str, Any]:
+    async def import_from_flatfile(
+        self,
+        table_name: str,
+        file_path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return await run_blocking(
+            self._import_from_flatfile, table_name, file_path, columns, chunk_rows, chunk_bytes
+        )
+
+    def _import_from_flatfile(
+        self,
+        table_name: str,
+        file_path: str,
+        columns: List[str],
+        chunk_rows: Optional[int] = None,
+        chunk_bytes: Optional[int] = None
+    ) -> Dict[str, Any]:
         try:
-            # Read the CSV file
-            df = pd.read_csv(file_path)
-            
-            # Select only the specified columns
-            if columns:
-                df = df[columns]
-            
-            # Convert DataFrame to list of dictionaries
-            records = df.to_dict('records')
-            
-            # Insert data into ClickHouse
-            self.client.insert(table_name, records)
-            
+            # The same checkpointed, deduplicated and timed path as /api/clickhouse/import
+            result = ClickHouseService(self.client, self.current_config)._import_from_flatfile(
+                table_name, file_path, columns, chunk_rows, chunk_bytes
+            )
             return {
                 "status": "success",
-                "message": f"Successfully imported {len(records)} records",
-                "record_count": len(records)
+                "message": f"Successfully imported {result.record_count} records",
+                "record_count": result.record_count,
+                "batch_count": result.batch_count,
+                "resumed_rows": result.resumed_rows,
+                "elapsed_seconds": result.elapsed_seconds,
+                "rows_per_second": result.rows_per_second
             }
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
     async def export_to_flatfile(self, table_name: str, columns: List[str], file_path: str) -> Dict[str, Any]:
+        return await run_blocking(self._export_to_flatfile, table_name, columns, file_path)
+
+    def _export_to_flatfile(self, table_name: str, columns: List[str], file_path: str) -> Dict[str, Any]:
         try:
             # Build the query
             query = f"SELECT {', '.join(columns)} FROM {table_name}"
-            
-            # Execute query and get results
-            result = self.client.query(query)
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(result.result_rows, columns=columns)
-            
-            # Save to CSV
-            df.to_csv(file_path, index=False)
+
+            # Stream result blocks to the CSV file through the shared, type-aware
+            # writer, compressing them when the path ends in .gz, .zst or .lz4
+            record_count, _ = ClickHouseService(self.client, self.current_config).write_query_to_csv(
+                query, columns, file_path, compression=compression_from_extension(file_path)
+            )
+            file_manifest.record(file_path, "export", record_count, columns=columns, source_table=table_name)
             
             return {
                 "status": "success",
-                "message": f"Successfully exported {len(df)} records",
-                "record_count": len(df),
+                "message": f"Successfully exported {record_count} records",
+                "record_count": record_count,
                 "file_path": file_path
             }
         except Exception as e:
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from models.jobs import JobStatus
+from services.executor import run_blocking
+from services.metrics import Gauge, registry
+from services.profiling import current_capture
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobProgress:
+    """Progress and cancellation handle passed into long-running service calls.
+
+    Services call :meth:`advance` after each chunk or block and
+    :meth:`check_cancelled` between them; both are safe to call from the worker
+    thread while the status endpoint reads the counters.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.started = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def advance(self, rows: int = 0, nbytes: int = 0):
+        # Partitioned exports advance from several shard threads at once
+        with self._lock:
+            self.rows += rows
+            self.bytes += nbytes
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled("Job was cancelled")
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.started:
+            return 0.0
+        elapsed = time.monotonic() - self.started
+        return round(self.rows / elapsed, 1) if elapsed > 0 else 0.0
+
+
+class Job:
+    def __init__(self, kind: str, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = "queued"
+        self.progress = JobProgress()
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def to_status(self) -> JobStatus:
+        return JobStatus(
+            id=self.id,
+            kind=self.kind,
+            status=self.status,
+            rows_processed=self.progress.rows,
+            bytes_processed=self.progress.bytes,
+            rows_per_second=self.progress.rows_per_second,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            error=self.error,
+            result=self.result
+        )
+
+
+class JobManager:
+    """Runs imports and exports in the background, at most
+    ``settings.MAX_CONCURRENT_JOBS`` at a time; the rest wait in FIFO order.
+    """
+
+    def __init__(self, max_concurrent: int, history_size: int):
+        self.max_concurrent = max_concurrent
+        self.history_size = history_size
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(self, kind: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Job:
+        """Schedule ``func(*args, progress=..., **kwargs)`` in the blocking-work pool."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        job = Job(kind, func, args, kwargs)
+        self._jobs[job.id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: Job):
+        # Jobs outlive the request that submitted them, so they are never part of its profile
+        current_capture.set(None)
+        async with self._semaphore:
+            if job.progress.cancelled:
+                # Normally marked by cancel() already; covers a cancel racing the slot
+                job.status = "cancelled"
+                job.finished_at = job.finished_at or datetime.utcnow()
+                return
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            job.progress.started = time.monotonic()
+            try:
+                result = await run_blocking(job.func, *job.args, progress=job.progress, **job.kwargs)
+                job.result = result.model_dump() if hasattr(result, "model_dump") else result
+                job.status = "completed"
+            except JobCancelled:
+                job.status = "cancelled"
+            except asyncio.CancelledError:
+                # The task itself was cancelled, e.g. at shutdown
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                if job.progress.cancelled:
+                    job.status = "cancelled"
+                else:
+                    job.status = "failed"
+                    job.error = getattr(e, "detail", None) or str(e)
+            finally:
+                job.finished_at = datetime.utcnow()
+
+    def _prune(self):
+        # Forget the oldest finished jobs beyond the history size
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.finished_at is None:
+            job.progress.cancel()
+            if job.started_at is None:
+                # Still waiting for a slot: done now, not when a slot frees up
+                job.status = "cancelled"
+                job.finished_at = datetime.utcnow()
+                if job.task is not None:
+                    job.task.cancel()
+        return job
+
+    def in_flight(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+
+
+job_manager = JobManager(settings.MAX_CONCURRENT_JOBS, settings.JOB_HISTORY_SIZE)
+
+
+def _job_counts():
+    counts: Dict[tuple, int] = {}
+    for job in job_manager.list():
+        counts[(job.kind, job.status)] = counts.get((job.kind, job.status), 0) + 1
+    return [({"kind": kind, "status": status}, count) for (kind, status), count in counts.items()]
+
+
+registry.register(Gauge("jobs", "Tracked background jobs by kind and status", ("kind", "status"), callback=_job_counts))
+registry.register(Gauge(
+    "jobs_in_flight", "Background jobs queued or running", callback=lambda: [({}, job_manager.in_flight())]
+))
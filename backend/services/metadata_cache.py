@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from config.settings import settings
+
+TABLES_KEY = "*tables*"
+
+
+class MetadataCache:
+    """In-process TTL + LRU cache for schema metadata.
+
+    Entries are keyed by ``(connection_key, name)`` where ``name`` is a
+    ``database.table`` string for column lists or :data:`TABLES_KEY` for the
+    table listing. Imports and DDL invalidate the affected entries explicitly.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, connection_key: Hashable, name: str) -> Optional[Any]:
+        key = (connection_key, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, connection_key: Hashable, name: str, value: Any):
+        key = (connection_key, name)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, connection_key: Hashable, table: Optional[str] = None):
+        """Drop ``table``'s columns and the table listing, or everything for the connection."""
+        with self._lock:
+            if table is None:
+                for key in [key for key in self._entries if key[0] == connection_key]:
+                    del self._entries[key]
+                return
+            bare = table.split('.')[-1]
+            for key in list(self._entries):
+                if key[0] == connection_key and (key[1] in (table, bare, TABLES_KEY) or key[1].endswith('.' + bare)):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+metadata_cache = MetadataCache(settings.METADATA_CACHE_TTL_SECONDS, settings.METADATA_CACHE_MAX_ENTRIES)
@@ -0,0 +1,297 @@
+import asyncio
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from config.settings import settings
+
+T = TypeVar("T")
+
+PROFILE_DIR = ".profiles"
+PROFILE_HEADER = b"x-profile"
+PROFILES_ROUTE = "/api/profiles"
+_CAPTURE_ID = re.compile(r"^[0-9A-Za-z-]+$")
+
+# The capture of the request being handled, if it is being profiled. Blocking
+# work inherits it through run_blocking, which copies the caller's context.
+current_capture: contextvars.ContextVar[Optional["ProfileCapture"]] = contextvars.ContextVar(
+    "current_capture", default=None
+)
+
+
+class ProfileCapture:
+    """CPU profile and allocation sites of one request's blocking work.
+
+    Only code run through :meth:`run` (every ``run_blocking`` call of the
+    request) and iterators wrapped with :func:`profile_iterator` is profiled.
+    tracemalloc is process-wide, so allocations of concurrent requests can
+    show up in the top sites too.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        self._stats: Optional[pstats.Stats] = None
+        # Allocation sites at the end of the blocking call that held the most memory
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_size = -1
+        self._started_tracing = False
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+
+    def run(self, func: Callable[[], T]) -> T:
+        if self._finished:
+            return func()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active in this interpreter (Python 3.12+ allows one)
+            return func()
+        try:
+            return func()
+        finally:
+            profiler.disable()
+            self._collect(profiler)
+
+    def _collect(self, profiler: cProfile.Profile):
+        # Snapshots are costly, so only take one when more memory is held than at the last
+        size = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else -1
+        snapshot = tracemalloc.take_snapshot() if size > self._snapshot_size else None
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+            if snapshot is not None and size > self._snapshot_size:
+                self._snapshot, self._snapshot_size = snapshot, size
+
+    def dump_stats(self, path: str) -> bool:
+        if self._stats is None:
+            return False
+        self._stats.dump_stats(path)
+        return True
+
+    def finish(self, status: int) -> Dict[str, Any]:
+        """Stop tracing and return the capture summary."""
+        self._finished = True
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        if self._started_tracing:
+            tracemalloc.stop()
+        top_n = settings.PROFILE_TOP_N
+        functions = []
+        if self._stats is not None:
+            stats = self._stats.stats
+            for func in sorted(stats, key=lambda f: stats[f][3], reverse=True)[:top_n]:
+                _, calls, tottime, cumtime, _ = stats[func]
+                functions.append({
+                    "function": f"{func[0]}:{func[1]}({func[2]})",
+                    "calls": calls,
+                    "total_seconds": round(tottime, 6),
+                    "cumulative_seconds": round(cumtime, 6),
+                })
+        allocations = []
+        if self._snapshot is not None:
+            for stat in self._snapshot.statistics("lineno")[:top_n]:
+                frame = stat.traceback[0]
+                allocations.append({"site": f"{frame.filename}:{frame.lineno}", "size_bytes": stat.size, "count": stat.count})
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "started_at": self.started_at.isoformat(),
+            "elapsed_seconds": round(time.perf_counter() - self._start, 3),
+            "peak_traced_bytes": peak,
+            "top_functions": functions,
+            "top_allocations": allocations,
+        }
+
+
+def profile_iterator(iterator: Iterator[T]) -> Iterator[T]:
+    """Profile each step of ``iterator`` under the current capture, if there is one.
+
+    For iterators consumed outside run_blocking, such as streamed response
+    bodies; without an active capture ``iterator`` is returned unchanged.
+    """
+    capture = current_capture.get()
+    if capture is None:
+        return iterator
+    return _profiled(capture, iterator)
+
+
+def _profiled(capture: ProfileCapture, iterator: Iterator[T]) -> Iterator[T]:
+    sentinel = object()
+    try:
+        while True:
+            item = capture.run(lambda: next(iterator, sentinel))
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+class ProfileStore:
+    """Finished captures in ``.profiles/``, newest ``PROFILE_MAX_CAPTURES`` kept.
+
+    Each capture is a JSON summary plus a ``.prof`` file in pstats format
+    (``python -m pstats``, snakeviz). Profiling one request at a time keeps
+    the process-wide profilers from mixing requests; a request arriving
+    while another is profiled runs unprofiled.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._active = threading.Lock()
+        self._armed = 0
+        self._armed_prefix = ""
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return self._directory or os.path.join(settings.UPLOAD_DIR, PROFILE_DIR)
+
+    def arm(self, count: int, path_prefix: str = ""):
+        """Profile the next ``count`` requests whose path starts with ``path_prefix``."""
+        with self._lock:
+            self._armed = count
+            self._armed_prefix = path_prefix
+
+    def armed(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"count": self._armed, "path_prefix": self._armed_prefix}
+
+    def _wanted(self, scope) -> bool:
+        if any(name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope.get("headers", ())):
+            return True
+        with self._lock:
+            # Requests to the profiles API itself never use up an armed capture
+            path = scope["path"]
+            if self._armed > 0 and path.startswith(self._armed_prefix) and not path.startswith(PROFILES_ROUTE):
+                self._armed -= 1
+                return True
+        return False
+
+    def begin(self, scope) -> Optional[ProfileCapture]:
+        """Start a capture if the request asks for one and none is running."""
+        if not self._active.acquire(blocking=False):
+            return None
+        if not self._wanted(scope):
+            self._active.release()
+            return None
+        capture = ProfileCapture(scope["method"], scope["path"])
+        capture.start()
+        return capture
+
+    def end(self, capture: ProfileCapture, status: int):
+        """Write the capture out and let the next request be profiled."""
+        try:
+            summary = capture.finish(status)
+            os.makedirs(self.directory, exist_ok=True)
+            capture.dump_stats(os.path.join(self.directory, f"{capture.id}.prof"))
+            tmp_path = os.path.join(self.directory, f"{capture.id}.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(summary, f)
+            os.replace(tmp_path, os.path.join(self.directory, f"{capture.id}.json"))
+            self._prune()
+        finally:
+            self._active.release()
+
+    def _prune(self):
+        ids = self._ids()
+        for capture_id in ids[:max(0, len(ids) - settings.PROFILE_MAX_CAPTURES)]:
+            for extension in (".json", ".prof"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{capture_id}{extension}"))
+                except FileNotFoundError:
+                    pass
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with their timestamp, so they sort oldest first
+        return sorted(name[:-len(".json")] for name in names if name.endswith(".json"))
+
+    def list(self) -> List[Dict[str, Any]]:
+        entries = []
+        for capture_id in reversed(self._ids()):
+            summary = self.get(capture_id)
+            if summary is not None:
+                entries.append({key: value for key, value in summary.items() if not key.startswith("top_")})
+        return entries
+
+    def get(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        if not _CAPTURE_ID.match(capture_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{capture_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def profile_path(self, capture_id: str) -> Optional[str]:
+        if not _CAPTURE_ID.match(capture_id):
+            return None
+        path = os.path.join(self.directory, f"{capture_id}.prof")
+        return path if os.path.isfile(path) else None
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """Profile requests sent with an ``X-Profile: 1`` header or armed via ``/api/profiles/arm``.
+
+    A plain ASGI middleware, so the capture spans the whole response,
+    streamed bodies included. The response carries the capture id in an
+    ``X-Profile-Id`` header. Only installed when ``PROFILING_ENABLED`` is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        capture = profile_store.begin(scope) if scope["type"] == "http" else None
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", capture.id.encode())]
+            await send(message)
+
+        token = current_capture.set(capture)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            current_capture.reset(token)
+            # Writing the capture is file I/O, kept off the event loop
+            await asyncio.to_thread(profile_store.end, capture, status)
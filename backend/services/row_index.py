@@ -0,0 +1,207 @@
+import io
+import os
+import struct
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from services.columnar_io import count_rows as count_columnar_rows, detect_columnar, read_rows as read_columnar_rows
+from services.compression import detect_compression, open_input
+from services.flatfile_io import count_rows
+from services.serialization import shape_columns
+
+INDEX_SUFFIX = ".rowidx"
+INDEX_MAGIC = b"RIDX1\0\0\0"
+# magic, source size, source mtime_ns, stride, row count
+INDEX_HEADER = struct.Struct("<8sQQQQ")
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+NEWLINE = ord('\n')
+QUOTE = ord('"')
+
+
+def _record_ends(block: bytes, in_quote: bool) -> Tuple[np.ndarray, bool]:
+    """Return offsets just past each record-terminating newline in ``block``.
+
+    A newline ends a record only outside a quoted field. ``in_quote`` is the
+    quoting state at the start of the block; the state at its end is returned
+    alongside the offsets so blocks can be scanned one after another.
+    """
+    data = np.frombuffer(block, dtype=np.uint8)
+    quotes = np.cumsum(data == QUOTE, dtype=np.int64)
+    newlines = np.flatnonzero(data == NEWLINE)
+    parity = (quotes[newlines] + int(in_quote)) & 1
+    ends = newlines[parity == 0] + 1
+    end_state = bool((int(quotes[-1]) + int(in_quote)) & 1) if len(data) else in_quote
+    return ends, end_state
+
+
+class RowIndex:
+    """Byte offsets of every ``stride``-th record in a CSV file.
+
+    Stored as a sidecar ``<file>.rowidx`` and rebuilt when the file's size or
+    mtime no longer match, so reading page N costs one seek plus skipping at
+    most ``stride - 1`` records.
+    """
+
+    def __init__(self, file_path: str, stride: int, row_count: int, header: bytes, offsets: array):
+        self.file_path = file_path
+        self.stride = stride
+        self.row_count = row_count
+        self.header = header
+        self.offsets = offsets
+
+    @staticmethod
+    def index_path(file_path: str) -> str:
+        return file_path + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, file_path: str, stride: int) -> "RowIndex":
+        offsets = array('Q')
+        row_count = 0
+        in_quote = False
+        with open(file_path, 'rb') as f:
+            header = f.readline()
+            position = len(header)
+            next_start = position
+            while True:
+                block = f.read(SCAN_BLOCK_SIZE)
+                if not block:
+                    break
+                ends, in_quote = _record_ends(block, in_quote)
+                # Record starts: where the previous record ended
+                starts = np.concatenate(([next_start], ends[:-1] + position)) if len(ends) else np.empty(0, dtype=np.int64)
+                if len(ends):
+                    first = (-row_count) % stride
+                    offsets.extend(int(x) for x in starts[first::stride])
+                    row_count += len(ends)
+                    next_start = int(ends[-1]) + position
+                position += len(block)
+            if position > next_start:
+                # Final record without a trailing newline
+                if row_count % stride == 0:
+                    offsets.append(next_start)
+                row_count += 1
+        return cls(file_path, stride, row_count, header, offsets)
+
+    def save(self):
+        stat = os.stat(self.file_path)
+        tmp_path = self.index_path(self.file_path) + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, self.stride, self.row_count))
+            self.offsets.tofile(f)
+        os.replace(tmp_path, self.index_path(self.file_path))
+
+    @classmethod
+    def load(cls, file_path: str, stride: int) -> Optional["RowIndex"]:
+        """Load the sidecar index if it is still valid for ``file_path``."""
+        try:
+            stat = os.stat(file_path)
+            with open(cls.index_path(file_path), 'rb') as f:
+                magic, size, mtime_ns, stored_stride, row_count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+                if magic != INDEX_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns or stored_stride != stride:
+                    return None
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+        except (OSError, struct.error):
+            return None
+        with open(file_path, 'rb') as f:
+            header = f.readline()
+        return cls(file_path, stride, row_count, header, offsets)
+
+    def read_rows(self, offset: int, limit: int) -> bytes:
+        """Return the raw bytes of records ``[offset, offset + limit)``."""
+        if offset >= self.row_count or limit <= 0:
+            return b''
+        limit = min(limit, self.row_count - offset)
+        skip = offset % self.stride
+        wanted = skip + limit
+        chunks = []
+        found = 0
+        in_quote = False
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offsets[offset // self.stride])
+            start_in_chunks = None
+            total = 0
+            while found < wanted:
+                block = f.read(max(SCAN_BLOCK_SIZE // 4, 64 * 1024))
+                if not block:
+                    break
+                ends, in_quote = _record_ends(block, in_quote)
+                chunks.append(block)
+                for end in ends:
+                    found += 1
+                    if found == skip:
+                        start_in_chunks = total + int(end)
+                    if found == wanted:
+                        data = b''.join(chunks)
+                        return data[start_in_chunks or 0:total + int(end)]
+                total += len(block)
+        data = b''.join(chunks)
+        return data[start_in_chunks or 0:]
+
+
+_lock = threading.Lock()
+
+
+def get_row_index(file_path: str) -> RowIndex:
+    stride = settings.ROW_INDEX_STRIDE
+    index = RowIndex.load(file_path, stride)
+    if index is None:
+        with _lock:
+            index = RowIndex.load(file_path, stride)
+            if index is None:
+                index = RowIndex.build(file_path, stride)
+                index.save()
+    return index
+
+
+def _read_compressed_page(file_path: str, offset: int, limit: int, total: Optional[int]) -> Tuple[pd.DataFrame, int]:
+    # Compressed files cannot be seeked into, so the page is reached by
+    # decompressing and skipping the records before it
+    if total is None:
+        total = count_rows(file_path)[0]
+    if offset >= total:
+        return pd.DataFrame(), total
+    with open_input(file_path) as f:
+        # A callable, since pandas turns a range into a set of every skipped row number
+        df = pd.read_csv(f, skiprows=lambda i: 0 < i <= offset, nrows=limit)
+    return df, total
+
+
+def read_page_columns(
+    file_path: str, offset: int, limit: int, total: Optional[int] = None
+) -> Tuple[List[str], List[List[Any]], int]:
+    """Return ``(columns, values per column, total_rows)`` for one page of a CSV, Parquet or Arrow file.
+
+    ``total`` may be passed for compressed files whose row count is already
+    known, which spares a full decompression per page.
+    """
+    if detect_columnar(file_path):
+        # Row group (or batch) metadata locates the page without reading the rest
+        table = read_columnar_rows(file_path, offset, limit)
+        return table.column_names, [column.to_pylist() for column in table.columns], count_columnar_rows(file_path)
+    if detect_compression(file_path):
+        df, total = _read_compressed_page(file_path, offset, limit, total)
+        if df.empty:
+            return [], [], total
+    else:
+        index = get_row_index(file_path)
+        data = index.read_rows(offset, limit)
+        if not data:
+            return [], [], index.row_count
+        df = pd.read_csv(io.BytesIO(index.header + data))
+        total = index.row_count
+    # NaN is not valid JSON
+    df = df.astype(object).where(df.notna(), None)
+    return [str(column) for column in df.columns], [df[column].tolist() for column in df.columns], total
+
+
+def read_page(file_path: str, offset: int, limit: int, total: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Return ``(records, total_rows)`` for one page, each record carrying its 1-based row ``id``."""
+    columns, data, total = read_page_columns(file_path, offset, limit, total)
+    return shape_columns(columns, data, "records", first_id=offset + 1)["records"], total
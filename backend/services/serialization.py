@@ -0,0 +1,80 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+# records: one object per row; columns: an array per column; rows: an array per row
+RESPONSE_SHAPES = ("records", "columns", "rows")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    if hasattr(value, "item"):
+        # NumPy scalars
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact JSON, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips FastAPI's per-value ``jsonable_encoder`` pass.
+
+    Models are encoded field by field without being dumped to dicts first.
+    Returning it from a route bypasses the ``response_model`` validation,
+    which stays on the route for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = dict(content)
+        return dumps(content)
+
+
+def validate_shape(shape: str) -> str:
+    if shape not in RESPONSE_SHAPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported shape '{shape}'. Expected one of: {', '.join(RESPONSE_SHAPES)}"
+        )
+    return shape
+
+
+def shape_columns(columns: List[str], data: List[List[Any]], shape: str, first_id: Optional[int] = None) -> Dict[str, Any]:
+    """Lay out a page given as per-column value lists in the requested response shape.
+
+    ``records`` repeats the column names in every row and, with ``first_id``,
+    numbers the rows; ``columns`` and ``rows`` name the columns once.
+    """
+    if shape == "columns":
+        return {"columns": columns, "data": data}
+    rows = zip(*data)
+    if shape == "rows":
+        return {"columns": columns, "data": [list(row) for row in rows]}
+    if first_id is None:
+        return {"records": [dict(zip(columns, row)) for row in rows]}
+    return {"records": [dict(zip(columns, row), id=first_id + i) for i, row in enumerate(rows)]}
@@ -0,0 +1,129 @@
+from datetime import date
+from typing import List, Optional
+
+from config.settings import settings
+from models.flatfile import ColumnInfo, TableDesign
+from services.columnar_io import column_infos, detect_columnar, iter_tables
+from services.type_inference import infer_schema, is_low_cardinality
+from services.value_conversion import base_type
+
+# Types that make useful sorting key columns; floats and decimals do not
+KEY_TYPE_PREFIXES = ('String', 'Bool', 'UInt', 'Int', 'Date')
+
+
+def quote_identifier(name: str) -> str:
+    return "`" + name.replace("\\", "\\\\").replace("`", "\\`") + "`"
+
+
+def quote_table(table_name: str) -> str:
+    """Quote a ``table`` or ``database.table`` name."""
+    return ".".join(quote_identifier(part) for part in table_name.split(".", 1))
+
+
+def _columnar_schema(file_path: str) -> List[ColumnInfo]:
+    # Types come from the file's schema; statistics from its first rows
+    columns = column_infos(file_path)
+    head = next(iter_tables(file_path, batch_rows=settings.INFERENCE_HEAD_ROWS), None)
+    if head is None:
+        return columns
+    for column in columns:
+        values = head.column(column.name).to_pandas().dropna()
+        column.sample_rows = head.num_rows
+        column.sample_distinct = int(values.nunique())
+        base = base_type(column.type)
+        if base.startswith('Date') and not values.empty:
+            column.sample_min = str(values.min())
+            column.sample_max = str(values.max())
+        if base == 'String' and not column.low_cardinality and is_low_cardinality(column.sample_distinct, len(values)):
+            column.low_cardinality = True
+            column.type = f"LowCardinality({column.type})"
+    return columns
+
+
+def file_schema(file_path: str) -> List[ColumnInfo]:
+    """Column types and sample statistics for a CSV, Parquet or Arrow file."""
+    if detect_columnar(file_path):
+        return _columnar_schema(file_path)
+    return infer_schema(file_path)
+
+
+def sorting_key(columns: List[ColumnInfo]) -> List[ColumnInfo]:
+    """Pick ORDER BY columns: low-cardinality dimensions by ascending cardinality, then a time column.
+
+    Sorting on the coarsest columns first gives the longest runs of equal
+    values, which compress best and let the primary index skip the most
+    granules. Nullable columns are left out, since they cannot be key
+    columns by default, and so are constant columns, which prune nothing.
+    Bool columns only qualify when nothing else does.
+    """
+    keyable = [
+        column for column in columns
+        if not column.nullable and column.sample_rows and column.sample_distinct > 1
+        and base_type(column.type).startswith(KEY_TYPE_PREFIXES)
+    ]
+    candidates = [column for column in keyable if base_type(column.type) != 'Bool'] or keyable
+    time_column = _time_column(candidates)
+    dimensions = sorted(
+        (
+            column for column in candidates
+            if column is not time_column and is_low_cardinality(column.sample_distinct, column.sample_rows)
+        ),
+        key=lambda column: column.sample_distinct
+    )
+    limit = settings.AUTO_TABLE_ORDER_BY_COLUMNS - (1 if time_column else 0)
+    keys = dimensions[:limit] + ([time_column] if time_column else [])
+    # Without dimensions or a time column, the first keyable column (often an id) still beats tuple()
+    return keys or candidates[:1]
+
+
+def _time_column(columns: List[ColumnInfo]) -> Optional[ColumnInfo]:
+    return next((column for column in columns if base_type(column.type).startswith('Date')), None)
+
+
+def partition_expression(columns: List[ColumnInfo]) -> Optional[str]:
+    """Partition by month of the first non-nullable date column, or by year for long spans."""
+    time_column = _time_column([column for column in columns if not column.nullable])
+    if time_column is None or not time_column.sample_min:
+        return None
+    low = date.fromisoformat(time_column.sample_min[:10])
+    high = date.fromisoformat(time_column.sample_max[:10])
+    months = (high.year - low.year) * 12 + high.month - low.month + 1
+    function = 'toYYYYMM' if months <= settings.AUTO_TABLE_MAX_PARTITIONS else 'toYear'
+    return f"{function}({quote_identifier(time_column.name)})"
+
+
+def create_table_sql(
+    table_name: str,
+    columns: List[ColumnInfo],
+    order_by: List[str],
+    partition_by: Optional[str] = None
+) -> str:
+    definitions = ",\n".join(f"    {quote_identifier(column.name)} {column.type}" for column in columns)
+    key = ", ".join(quote_identifier(name) for name in order_by)
+    sql = f"CREATE TABLE IF NOT EXISTS {quote_table(table_name)}\n(\n{definitions}\n)\nENGINE = MergeTree"
+    if partition_by:
+        sql += f"\nPARTITION BY {partition_by}"
+    sql += f"\nORDER BY ({key})" if order_by else "\nORDER BY tuple()"
+    # Lets plain MergeTree drop chunks re-sent by a resumed import (insert_deduplication_token)
+    sql += "\nSETTINGS non_replicated_deduplication_window = 1000"
+    return sql
+
+
+def design_table(table_name: str, file_path: str, columns: Optional[List[str]] = None) -> TableDesign:
+    """Propose a MergeTree table for ``file_path`` (restricted to ``columns``, in that order)."""
+    schema = file_schema(file_path)
+    if columns:
+        by_name = {column.name: column for column in schema}
+        missing = [name for name in columns if name not in by_name]
+        if missing:
+            raise ValueError(f"Columns not found in file: {', '.join(missing)}")
+        schema = [by_name[name] for name in columns]
+
+    order_by = [column.name for column in sorting_key(schema)]
+    partition_by = partition_expression(schema)
+    return TableDesign(
+        columns=schema,
+        order_by=order_by,
+        partition_by=partition_by,
+        ddl=create_table_sql(table_name, schema, order_by, partition_by)
+    )
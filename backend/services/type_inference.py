@@ -0,0 +1,196 @@
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from models.flatfile import ColumnInfo
+from services.compression import detect_compression, open_input
+from services.file_index import content_hash
+from services.flatfile_io import read_header
+
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}$')
+DATETIME64_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}\.\d{1,9}$')
+BOOL_VALUES = {'true', 'false'}
+
+INT_TYPES = [
+    ('UInt8', 0, 2 ** 8 - 1), ('UInt16', 0, 2 ** 16 - 1), ('UInt32', 0, 2 ** 32 - 1), ('UInt64', 0, 2 ** 64 - 1),
+    ('Int8', -2 ** 7, 2 ** 7 - 1), ('Int16', -2 ** 15, 2 ** 15 - 1), ('Int32', -2 ** 31, 2 ** 31 - 1),
+    ('Int64', -2 ** 63, 2 ** 63 - 1),
+]
+# DateTime covers 1970-01-01 .. 2106-02-07, Date covers 1970-01-01 .. 2149-06-06
+DATETIME_RANGE = (pd.Timestamp('1970-01-01'), pd.Timestamp('2106-02-07'))
+DATE_RANGE = (pd.Timestamp('1970-01-01'), pd.Timestamp('2149-06-06'))
+
+
+def sample_csv(file_path: str, head_rows: int, strides: int, stride_rows: int) -> pd.DataFrame:
+    """Read the first ``head_rows`` rows plus ``strides`` evenly spaced slices.
+
+    Every value is kept as a string so inference sees the raw text. Slices start
+    at the first line break after their offset, so a quoted field spanning
+    lines can occasionally skew a slice; such slices are skipped. Compressed
+    files cannot be seeked into and files the head already covers have
+    nothing left to stride over, so both are sampled from the head alone.
+    """
+    header = read_header(file_path)
+    with open_input(file_path) as f:
+        head = pd.read_csv(f, nrows=head_rows, dtype=str, keep_default_na=False)
+    frames = [head]
+    if len(head) < head_rows or detect_compression(file_path):
+        return head
+    size = os.path.getsize(file_path)
+
+    with open(file_path, 'rb') as f:
+        f.readline()
+        head_end = f.tell()
+        step = (size - head_end) // (strides + 1) if strides else 0
+        for i in range(1, strides + 1):
+            f.seek(head_end + i * step)
+            f.readline()  # Align to the next line
+            lines = []
+            for _ in range(stride_rows):
+                line = f.readline()
+                if not line:
+                    break
+                lines.append(line)
+            if not lines:
+                continue
+            try:
+                frames.append(pd.read_csv(
+                    io.BytesIO(b''.join(lines)), header=None, names=header, dtype=str, keep_default_na=False
+                ))
+            except (pd.errors.ParserError, ValueError):
+                continue
+    return pd.concat(frames, ignore_index=True)
+
+
+def _is_null(values: pd.Series) -> pd.Series:
+    return values.isin(['', 'NULL', 'null', '\\N', 'NaN', 'nan'])
+
+
+def _integer_type(numbers: pd.Series) -> str:
+    """Narrowest integer type holding the sampled range with headroom, since unsampled rows may exceed it."""
+    low, high = int(numbers.min()), int(numbers.max())
+    headroom = settings.INFERENCE_INT_HEADROOM
+    fitting = [(name, type_min, type_max) for name, type_min, type_max in INT_TYPES if low >= type_min and high <= type_max]
+    for name, type_min, type_max in fitting:
+        if low * headroom >= type_min and high * headroom <= type_max:
+            return name
+    # Too close to every limit for headroom: the 64-bit type that still holds the sample
+    return next((name for name, _, _ in fitting if name.endswith('64')), 'Float64')
+
+
+def infer_base_type(values: pd.Series) -> str:
+    """Return the ClickHouse type (without Nullable) fitting all non-null ``values``."""
+    if values.empty:
+        return 'String'
+
+    if values.str.lower().isin(BOOL_VALUES).all():
+        return 'Bool'
+
+    numbers = pd.to_numeric(values, errors='coerce')
+    if numbers.notna().all():
+        if np.all(np.mod(numbers, 1) == 0) and not values.str.contains(r'[.eE]', regex=True).any():
+            return _integer_type(numbers)
+        return 'Float64'
+
+    if values.str.match(DATE_RE).all():
+        dates = pd.to_datetime(values, format='%Y-%m-%d', errors='coerce')
+        if dates.notna().all():
+            in_range = dates.min() >= DATE_RANGE[0] and dates.max() <= DATE_RANGE[1]
+            return 'Date' if in_range else 'Date32'
+
+    if values.str.match(DATETIME_RE).all() or values.str.match(DATETIME64_RE).all():
+        times = pd.to_datetime(values.str.replace('T', ' ', regex=False), errors='coerce')
+        if times.notna().all():
+            if values.str.match(DATETIME64_RE).all():
+                return 'DateTime64(3)'
+            in_range = times.min() >= DATETIME_RANGE[0] and times.max() <= DATETIME_RANGE[1]
+            return 'DateTime' if in_range else 'DateTime64(3)'
+
+    return 'String'
+
+
+def is_low_cardinality(distinct: int, values: int) -> bool:
+    """Whether a string column with ``distinct`` values among ``values`` non-null samples suits LowCardinality."""
+    return (
+        values > 0
+        and distinct <= settings.LOW_CARDINALITY_MAX_DISTINCT
+        and distinct / values <= settings.LOW_CARDINALITY_MAX_RATIO
+    )
+
+
+def infer_column(name: str, raw: pd.Series) -> ColumnInfo:
+    nulls = _is_null(raw)
+    values = raw[~nulls]
+    base = infer_base_type(values)
+    nullable = bool(nulls.any())
+    distinct = int(values.nunique())
+
+    low_cardinality = base == 'String' and is_low_cardinality(distinct, len(values))
+    ch_type = f"Nullable({base})" if nullable else base
+    if low_cardinality:
+        ch_type = f"LowCardinality({ch_type})"
+
+    # ISO dates and times sort as text, which is all table design needs
+    time_range = base.startswith('Date') and not values.empty
+    return ColumnInfo(
+        name=name,
+        type=ch_type,
+        nullable=nullable,
+        low_cardinality=low_cardinality,
+        sample_rows=len(raw),
+        sample_distinct=distinct,
+        sample_min=values.min() if time_range else None,
+        sample_max=values.max() if time_range else None
+    )
+
+
+class InferenceCache:
+    """LRU of inferred schemas keyed by file content hash."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[ColumnInfo]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[ColumnInfo]]:
+        with self._lock:
+            columns = self._entries.get(key)
+            if columns is not None:
+                self._entries.move_to_end(key)
+            return columns
+
+    def set(self, key: str, columns: List[ColumnInfo]):
+        with self._lock:
+            self._entries[key] = columns
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+inference_cache = InferenceCache(max_entries=256)
+
+
+def infer_schema(file_path: str) -> List[ColumnInfo]:
+    """Propose ClickHouse column types for a CSV file from a bounded sample."""
+    key = content_hash(file_path)
+    cached = inference_cache.get(key)
+    if cached is not None:
+        return [column.model_copy() for column in cached]
+
+    sample = sample_csv(
+        file_path,
+        head_rows=settings.INFERENCE_HEAD_ROWS,
+        strides=settings.INFERENCE_STRIDES,
+        stride_rows=settings.INFERENCE_STRIDE_ROWS
+    )
+    columns = [infer_column(name, sample[name]) for name in sample.columns]
+    inference_cache.set(key, columns)
+    return [column.model_copy() for column in columns]
@@ -0,0 +1,109 @@
+import math
+import re
+from typing import Any, Callable, List, Optional, Sequence
+
+# Output targets: CSV text as ClickHouse writes it, or JSON-ready Python values
+TARGETS = ("csv", "json")
+
+Converter = Callable[[Sequence[Any]], Sequence[Any]]
+
+_WRAPPERS = re.compile(r"^(?:Nullable|LowCardinality)\((.*)\)$")
+_ENUM_ITEM = re.compile(r"'((?:[^'\\]|\\.)*)'\s*=\s*(-?\d+)")
+_PRECISION = re.compile(r"^DateTime64\((\d+)")
+
+
+def base_type(type_name: str) -> str:
+    """Strip Nullable and LowCardinality wrappers: ``LowCardinality(Nullable(String))`` -> ``String``."""
+    type_name = type_name.strip()
+    match = _WRAPPERS.match(type_name)
+    while match:
+        type_name = match.group(1).strip()
+        match = _WRAPPERS.match(type_name)
+    return type_name
+
+
+def _map_values(func: Callable[[Any], Any]) -> Converter:
+    def convert(values: Sequence[Any]) -> List[Any]:
+        return [None if value is None else func(value) for value in values]
+    return convert
+
+
+def _datetime_text(precision: int) -> Callable[[Any], str]:
+    # ClickHouse's text layout: no "T", no UTC offset, exactly `precision` fraction digits
+    if precision == 0:
+        return lambda value: value.isoformat(" ", "seconds")[:19]
+    width = 20 + min(precision, 6)
+    padding = "0" * max(precision - 6, 0)
+    return lambda value: value.isoformat(" ", "microseconds")[:width] + padding
+
+
+def _enum_names(type_name: str) -> Converter:
+    names = {int(number): name.replace("\\'", "'") for name, number in _ENUM_ITEM.findall(type_name)}
+
+    def convert(values: Sequence[Any]) -> Sequence[Any]:
+        # The client normally returns names already; only numeric blocks need mapping
+        first = next((value for value in values if value is not None), None)
+        if first is None or isinstance(first, str):
+            return values
+        return [names.get(value, value) for value in values]
+    return convert
+
+
+def _finite_or_none(values: Sequence[Any]) -> List[Any]:
+    # NaN and infinities are not valid JSON
+    return [value if value is not None and math.isfinite(value) else None for value in values]
+
+
+def column_converter(type_name: str, target: str) -> Optional[Converter]:
+    """Return the converter for one column of ClickHouse type ``type_name``, or None if values pass as-is.
+
+    Converters take and return a whole column of a block, so the type is
+    looked at once per column instead of once per value. NULLs stay None,
+    which the CSV writer leaves empty and JSON writes as null.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unsupported conversion target '{target}'")
+    name = base_type(type_name)
+    if name.startswith("DateTime64"):
+        match = _PRECISION.match(name)
+        return _map_values(_datetime_text(int(match.group(1)) if match else 3))
+    if name.startswith("DateTime"):
+        return _map_values(_datetime_text(0))
+    if name.startswith("Date"):
+        # str(date) is already ISO, which the CSV writer falls back to
+        return _map_values(lambda value: value.isoformat()) if target == "json" else None
+    if name.startswith("Enum"):
+        return _enum_names(name)
+    if name.startswith("Decimal"):
+        # Fixed-point text, never exponent notation; a string in JSON too, so no precision is lost
+        return _map_values(lambda value: format(value, "f"))
+    if name == "Bool":
+        return _map_values(lambda value: "true" if value else "false") if target == "csv" else None
+    if name.startswith("Float"):
+        return _finite_or_none if target == "json" else None
+    if name in ("UUID", "IPv4", "IPv6") or name.endswith(("Int128", "Int256")):
+        # Objects (or integers wider than JSON numbers) the CSV writer already prints with str()
+        return _map_values(str) if target == "json" else None
+    return None
+
+
+class BlockConverter:
+    """Per-column converters for a result, built once from its column types and reused for every block."""
+
+    def __init__(self, column_types: Sequence[str], target: str):
+        self.converters = [column_converter(type_name, target) for type_name in column_types]
+        self.identity = all(converter is None for converter in self.converters)
+
+    def convert(self, columns: Sequence[Sequence[Any]]) -> List[Sequence[Any]]:
+        """Convert one column-oriented block."""
+        if self.identity:
+            return list(columns)
+        return [
+            values if converter is None else converter(values)
+            for converter, values in zip(self.converters, columns)
+        ]
+
+
+def result_types(stream) -> List[str]:
+    """ClickHouse type names of the columns of a clickhouse_connect block stream."""
+    return [column_type.name for column_type in stream.source.column_types]
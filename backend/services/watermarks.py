@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+
+WATERMARKS_NAME = ".watermarks.json"
+
+
+def _encode(value: Any) -> Dict[str, Any]:
+    # Keep the type so the value binds back into the query as the same kind
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"type": "date", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"type": "decimal", "value": str(value)}
+    return {"type": "value", "value": value}
+
+
+def _decode(encoded: Dict[str, Any]) -> Any:
+    if encoded["type"] == "datetime":
+        return datetime.fromisoformat(encoded["value"])
+    if encoded["type"] == "date":
+        return date.fromisoformat(encoded["value"])
+    if encoded["type"] == "decimal":
+        return Decimal(encoded["value"])
+    return encoded["value"]
+
+
+class WatermarkStore:
+    """Last exported watermark per (table, destination), kept in ``.watermarks.json``.
+
+    A watermark is only stored once the export that reached it has been fully
+    written, so a failed run is simply repeated from the previous one.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._directory or settings.UPLOAD_DIR, WATERMARKS_NAME)
+
+    @staticmethod
+    def _key(table_name: str, destination: str) -> str:
+        return f"{table_name}|{destination}"
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, table_name: str, destination: str, column: str) -> Optional[Any]:
+        """Return the stored watermark, or None if there is none for ``column``."""
+        with self._lock:
+            entry = self._load().get(self._key(table_name, destination))
+        if entry is None or entry["column"] != column:
+            return None
+        return _decode(entry["watermark"])
+
+    def set(self, table_name: str, destination: str, column: str, value: Any, **extra: Any):
+        with self._lock:
+            data = self._load()
+            data[self._key(table_name, destination)] = {
+                "table": table_name,
+                "destination": destination,
+                "column": column,
+                "watermark": _encode(value),
+                "updated_at": datetime.utcnow().isoformat(),
+                **extra
+            }
+            self._save(data)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._load().values())
+        return [{**entry, "watermark": entry["watermark"]["value"]} for entry in entries]
+
+    def reset(self, table_name: str, destination: str) -> bool:
+        with self._lock:
+            data = self._load()
+            removed = data.pop(self._key(table_name, destination), None) is not None
+            if removed:
+                self._save(data)
+        return removed
+
+
+watermark_store = WatermarkStore()
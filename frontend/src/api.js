@@ -0,0 +1,26 @@
+import axios from 'axios';
+
+// The backend binds each ClickHouse connection to a session: /connect returns
+// an id in this header, and every later request sends it back
+const SESSION_HEADER = 'X-Session-Id';
+const SESSION_KEY = 'clickhouseSessionId';
+
+const api = axios.create();
+
+api.interceptors.request.use((config) => {
+  const sessionId = sessionStorage.getItem(SESSION_KEY);
+  if (sessionId) {
+    config.headers[SESSION_HEADER] = sessionId;
+  }
+  return config;
+});
+
+api.interceptors.response.use((response) => {
+  const sessionId = response.headers[SESSION_HEADER.toLowerCase()];
+  if (sessionId) {
+    sessionStorage.setItem(SESSION_KEY, sessionId);
+  }
+  return response;
+});
+
+export default api;
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { DataGrid } from '@mui/x-data-grid';
 import { Box, Typography, Paper, CircularProgress } from '@mui/material';
-import axios from 'axios';
+import api from '../api';
 
 const FlatFileUI = () => {
     const [data, setData] = useState([]);
@@ -18,13 +18,13 @@ const FlatFileUI = () => {
             setError(null);
             
             // Get the list of exported files
-            const response = await axios.get('http://localhost:8000/api/files');
+            const response = await api.get('http://localhost:8000/api/files');
             const files = response.data;
             
             if (files.length > 0) {
                 // Get the most recent file
                 const latestFile = files[0];
-                const fileResponse = await axios.get(`http://localhost:8000/api/files/${latestFile.id}`);
+                const fileResponse = await api.get(`http://localhost:8000/api/files/${latestFile.id}`);
                 setData(fileResponse.data.records);
             }
         } catch (err) {
@@ -26,7 +26,7 @@ import {
   Switch,
 } from '@mui/material';
 import { DataGrid } from '@mui/x-data-grid';
-import axios from 'axios';
+import api from '../api';
 
 const API_BASE_URL = 'http://localhost:8000/api';
 
@@ -95,7 +95,7 @@ function DataIngestion() {
   const fetchExportedFiles = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_BASE_URL}/files`);
+      const response = await api.get(`${API_BASE_URL}/files`);
       setExportedFiles(response.data);
       if (response.data.length > 0) {
         fetchFileData(response.data[0].id);
@@ -112,7 +112,7 @@ function DataIngestion() {
   const fetchFileData = async (fileId) => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_BASE_URL}/files/${fileId}`);
+      const response = await api.get(`${API_BASE_URL}/files/${fileId}`);
       setSelectedFileData(response.data.records);
     } catch (err) {
       setError('Failed to fetch file data');
@@ -129,7 +129,7 @@ function DataIngestion() {
       setError(null);
       setSuccess(null);
       
-      const response = await axios.post(`${API_BASE_URL}/clickhouse/connect`, chConfig);
+      const response = await api.post(`${API_BASE_URL}/clickhouse/connect`, chConfig);
       setTables(response.data || []);
       setSuccess('Successfully connected to ClickHouse');
     } catch (err) {
@@ -153,7 +153,7 @@ function DataIngestion() {
       } else {
         // Single table mode
         setSelectedTable(table);
-        const response = await axios.get(`${API_BASE_URL}/clickhouse/tables/${table}/columns`);
+        const response = await api.get(`${API_BASE_URL}/clickhouse/tables/${table}/columns`);
         setColumns(response.data || []);
         setSelectedColumns([]);
       }
@@ -181,7 +181,7 @@ function DataIngestion() {
       setError(null);
       
       const query = `SELECT ${selectedColumns.join(', ')} FROM ${selectedTable} LIMIT 100`;
-      const response = await axios.post(`${API_BASE_URL}/clickhouse/export`, {
+      const response = await api.post(`${API_BASE_URL}/clickhouse/export`, {
         table_name: selectedTable,
         columns: selectedColumns,
         query: query,
@@ -208,7 +208,7 @@ function DataIngestion() {
       setError(null);
       
       const query = `SELECT ${selectedColumns.join(', ')} FROM ${selectedTable}`;
-      const response = await axios.post(`${API_BASE_URL}/clickhouse/export`, {
+      const response = await api.post(`${API_BASE_URL}/clickhouse/export`, {
         table_name: selectedTable,
         columns: selectedColumns,
         query: query
@@ -233,7 +233,7 @@ function DataIngestion() {
       try {
         const formData = new FormData();
         formData.append('file', file);
-        const response = await axios.post(`${API_BASE_URL}/flatfile/preview`, formData);
+        const response = await api.post(`${API_BASE_URL}/flatfile/preview`, formData);
         setFilePreview(response.data);
         setImportColumns(response.data.columns.map(col => col.name));
       } catch (error) {
@@ -261,7 +261,7 @@ function DataIngestion() {
       formData.append('columns', JSON.stringify(importColumns));
       formData.append('delimiter', delimiter);
 
-      const response = await axios.post(`${API_BASE_URL}/flatfile/import`, formData);
+      const response = await api.post(`${API_BASE_URL}/flatfile/import`, formData);
       setSuccess(`Successfully imported ${response.data.record_count} records`);
       setFileToImport(null);
       setImportTableName('');
@@ -302,13 +302,13 @@ function DataIngestion() {
           keys: joinKeys
         };
         
-        response = await axios.post(`${API_BASE_URL}/clickhouse/export`, {
+        response = await api.post(`${API_BASE_URL}/clickhouse/export`, {
           columns: selectedColumns,
           join_conditions: joinConditions
         });
       } else {
         // Handle single table export
-        response = await axios.post(`${API_BASE_URL}/clickhouse/export`, {
+        response = await api.post(`${API_BASE_URL}/clickhouse/export`, {
           table_name: selectedTable,
           columns: selectedColumns
         });